@@ -0,0 +1,142 @@
+import random
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+from itertools import accumulate
+
+from django.db import transaction
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import FoodgramUser
+
+SEED_EMAIL = '@benchmark.local'
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rollback():
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def measure(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), statistics.median(timings)
+
+
+def run_prefix():
+    return f'run-{uuid.uuid4().hex[:12]}'
+
+
+def create_users(count, prefix=None):
+    prefix = prefix or run_prefix()
+    FoodgramUser.objects.bulk_create(
+        FoodgramUser(username=f'{prefix}-{index}',
+                     email=f'{prefix}-{index}{SEED_EMAIL}',
+                     first_name='Бенчмарк',
+                     last_name='Бенчмарк',
+                     password='!')
+        for index in range(count)
+    )
+    return list(FoodgramUser.objects.filter(
+        email__endswith=SEED_EMAIL, username__startswith=f'{prefix}-'))
+
+
+def create_ingredients(count, prefix=None):
+    prefix = prefix or run_prefix()
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f'{prefix} ингредиент {index}', measurement_unit='г')
+        for index in range(count)
+    )
+    return list(Ingredient.objects.filter(
+        name__startswith=f'{prefix} ингредиент '))
+
+
+def create_recipes(authors, count, ingredients=(), per_recipe=0,
+                   prefix=None, batch_size=1000):
+    prefix = prefix or run_prefix()
+    Recipe.objects.bulk_create(
+        (Recipe(author=random.choice(authors),
+                name=f'{prefix} рецепт {index}',
+                text='Рецепт для бенчмарка',
+                cooking_time=random.randint(1, 120))
+         for index in range(count)),
+        batch_size=batch_size,
+    )
+    recipes = list(Recipe.objects.filter(name__startswith=f'{prefix} рецепт '))
+    if per_recipe:
+        RecipeIngredient.objects.bulk_create(
+            (RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                              amount=random.randint(1, 500))
+             for recipe in recipes
+             for ingredient in random.sample(ingredients, per_recipe)),
+            batch_size=batch_size,
+        )
+    return recipes
+
+
+def zipf_weights(count, exponent):
+    return list(accumulate(1 / rank ** exponent
+                           for rank in range(1, count + 1)))
+
+
+def zipf_choices(population, weights, count):
+    return random.choices(population, cum_weights=weights, k=count)
+
+
+def zipf_sample(population, weights, count):
+    count = min(count, len(population))
+    chosen = set()
+    while len(chosen) < count:
+        chosen.update(zipf_choices(population, weights, count - len(chosen)))
+    return list(chosen)
+
+
+def create_tags(count, prefix=None):
+    prefix = prefix or run_prefix()
+    Tag.objects.bulk_create(
+        (Tag(name=f'{prefix} тег {index}',
+             color=f'#{random.randrange(0x1000000):06X}',
+             slug=f'{prefix}-{index}')
+         for index in range(count)),
+        ignore_conflicts=True,
+    )
+    return list(Tag.objects.filter(slug__startswith=f'{prefix}-'))
+
+
+def create_relations(model, users, targets, count, exponent,
+                     target_field='recipe', batch_size=1000, **fields):
+    users = random.sample(users, len(users))
+    targets = random.sample(targets, len(targets))
+    user_weights = zipf_weights(len(users), exponent)
+    target_weights = zipf_weights(len(targets), exponent)
+    pairs = set()
+    for _ in range(10):
+        missing = count - len(pairs)
+        if missing <= 0:
+            break
+        pairs.update(
+            (user.pk, target.pk) for user, target in zip(
+                zipf_choices(users, user_weights, missing),
+                zipf_choices(targets, target_weights, missing))
+            if user.pk != target.pk)
+    model.objects.bulk_create(
+        (model(user_id=user_id, **{f'{target_field}_id': target_id},
+               **{name: value() for name, value in fields.items()})
+         for user_id, target_id in pairs),
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    return len(pairs)
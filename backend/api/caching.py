@@ -0,0 +1,67 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from recipes.versions import get_versions
+
+
+class ResponseCache:
+
+    def __init__(self, prefix, version_names, ignored_params=()):
+        self.prefix = prefix
+        self.version_names = version_names
+        self.ignored_params = ignored_params
+
+    @property
+    def cache(self):
+        return caches[settings.RESPONSE_CACHE_ALIAS]
+
+    @property
+    def shared(self):
+        return not isinstance(self.cache, (LocMemCache, DummyCache))
+
+    def make_key(self, request):
+        params = sorted(
+            (name, sorted(request.query_params.getlist(name)))
+            for name in request.query_params
+            if name not in self.ignored_params
+        )
+        raw = json.dumps([request.get_host(), request.path, params,
+                          get_versions(*self.version_names)])
+        return f'{self.prefix}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+    def get(self, key):
+        data = self.cache.get(key)
+        self._incr('hits' if data is not None else 'misses')
+        return data
+
+    def set(self, key, data):
+        self.cache.set(key, data, settings.RESPONSE_CACHE_TIMEOUT)
+
+    def stats(self):
+        counters = self.cache.get_many(
+            [f'{self.prefix}:hits', f'{self.prefix}:misses'])
+        return {name: counters.get(f'{self.prefix}:{name}', 0)
+                for name in ('hits', 'misses')}
+
+    def reset_stats(self):
+        self.cache.delete_many(
+            [f'{self.prefix}:hits', f'{self.prefix}:misses'])
+
+    def _incr(self, name):
+        key = f'{self.prefix}:{name}'
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, 1, None)
+
+
+recipe_feed_cache = ResponseCache(
+    'recipe-feed',
+    version_names=('recipes', 'tags', 'ingredients', 'users'),
+    ignored_params=('is_favorited', 'is_in_shopping_cart'),
+)
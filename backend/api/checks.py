@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from .caching import recipe_feed_cache
+
+
+@register(Tags.caches)
+def response_cache_check(app_configs, **kwargs):
+    if settings.DEBUG or recipe_feed_cache.shared:
+        return []
+    return [Warning(
+        'Кэш ответов хранится в памяти процесса: каждый воркер кэширует '
+        'ленту отдельно, а счетчики попаданий не видны другим процессам.',
+        hint='Задайте REDIS_URL, например redis://redis:6379/0.',
+        id='api.W001',
+    )]
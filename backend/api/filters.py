@@ -1,7 +1,10 @@
 from django_filters import rest_framework
 from django_filters.rest_framework import FilterSet, filters
 
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.caches import recipe_ingredient_index, tag_registry
+from recipes.models import Ingredient, Recipe
+from recipes.search import search_recipes
+from .paginations import RankedQuerySet
 
 
 class IngredientFilter(FilterSet):
@@ -13,19 +16,52 @@ class IngredientFilter(FilterSet):
         fields = ('name', )
 
 
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    pass
+
+
+def tag_slug_choices():
+    return [(tag.slug, tag.name) for tag in tag_registry.all()]
+
+
+RECIPE_ORDERINGS = {
+    'popular': ('-favorites_count', '-pub_date', '-id'),
+    'trending': ('-trending_score', '-pub_date', '-id'),
+    'cooking_time': ('cooking_time', '-pub_date', '-id'),
+}
+
+
 class RecipeFilter(FilterSet):
-    tags = filters.ModelMultipleChoiceFilter(field_name='tags__slug',
-                                             to_field_name='slug',
-                                             queryset=Tag.objects.all())
+    tags = filters.MultipleChoiceFilter(choices=tag_slug_choices,
+                                        method='tags_filter')
     is_favorited = filters.BooleanFilter(
         method='is_favorited_filter')
     is_in_shopping_cart = filters.BooleanFilter(
         method='is_in_shopping_cart_filter')
+    search = filters.CharFilter(method='search_filter')
+    has_ingredients = NumberInFilter(method='has_ingredients_filter')
+    missing_max = filters.NumberFilter(method='missing_max_filter',
+                                       min_value=0, max_value=10)
+    ordering = filters.ChoiceFilter(
+        choices=[(name, name) for name in RECIPE_ORDERINGS],
+        method='ordering_filter')
 
     class Meta:
         model = Recipe
         fields = ('tags', 'author',)
 
+    def filter_queryset(self, queryset):
+        self.ranked_ids = None
+        queryset = super().filter_queryset(queryset)
+        if self.ranked_ids is not None:
+            ranked_ids = self.ranked_ids
+            if queryset.query.where:
+                allowed = set(queryset.order_by().values_list(
+                    'pk', flat=True).iterator())
+                ranked_ids = [pk for pk in ranked_ids if pk in allowed]
+            queryset.ranked = RankedQuerySet(queryset, ranked_ids)
+        return queryset
+
     def is_favorited_filter(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
@@ -37,3 +73,26 @@ class RecipeFilter(FilterSet):
         if value and user.is_authenticated:
             return queryset.filter(shoppingcart__user=user)
         return queryset
+
+    def tags_filter(self, queryset, name, value):
+        tags = [tag_registry.get_by_slug(slug) for slug in value]
+        return queryset.filter(pk__in=Recipe.tags.through.objects.filter(
+            tag_id__in=[tag.id for tag in tags if tag]).values('recipe_id'))
+
+    def ordering_filter(self, queryset, name, value):
+        return queryset.order_by(*RECIPE_ORDERINGS[value])
+
+    def search_filter(self, queryset, name, value):
+        value = value.strip()
+        if not value:
+            return queryset
+        return search_recipes(queryset, value)
+
+    def has_ingredients_filter(self, queryset, name, value):
+        missing_max = int(self.form.cleaned_data.get('missing_max') or 0)
+        self.ranked_ids = recipe_ingredient_index.ranked(
+            [int(ingredient_id) for ingredient_id in value], missing_max)
+        return queryset
+
+    def missing_max_filter(self, queryset, name, value):
+        return queryset
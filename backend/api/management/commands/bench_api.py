@@ -0,0 +1,388 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from collections import Counter, namedtuple
+from urllib.parse import quote
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import get_resolver
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.benchmarks import SEED_EMAIL
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.search import update_search_vectors
+from users.models import FoodgramUser, Subscription
+
+Scenario = namedtuple('Scenario', 'name url_name method path role data',
+                      defaults=(None,))
+
+BATCH_SIZE = 5
+RUN_EMAIL = '@benchmark-run.local'
+RUN_PASSWORD = 'Benchmark-password-1'
+
+FEED = '/api/recipes/?limit=6'
+SCENARIOS = (
+    Scenario('Корень API', 'api-root', 'get', '/api/', 'anonymous'),
+    Scenario('Теги', 'tags-list', 'get', '/api/tags/', 'anonymous'),
+    Scenario('Тег', 'tags-detail', 'get', '/api/tags/{tag_id}/',
+             'anonymous'),
+    Scenario('Ингредиенты: поиск', 'ingredients-list', 'get',
+             '/api/ingredients/?name={ingredient_name}', 'anonymous'),
+    Scenario('Ингредиент', 'ingredients-detail', 'get',
+             '/api/ingredients/{ingredient}/', 'anonymous'),
+    Scenario('Лента: аноним', 'recipes-list', 'get', FEED, 'anonymous'),
+    Scenario('Лента: аноним, страницы', 'recipes-list', 'get',
+             FEED + '&page={page}', 'anonymous'),
+    Scenario('Лента', 'recipes-list', 'get', FEED, 'user'),
+    Scenario('Лента: курсор', 'recipes-list', 'get',
+             FEED + '&pagination=cursor', 'user'),
+    Scenario('Лента: тег', 'recipes-list', 'get', FEED + '&tags={tag}',
+             'user'),
+    Scenario('Лента: избранное', 'recipes-list', 'get',
+             FEED + '&is_favorited=1', 'user'),
+    Scenario('Лента: в списке покупок', 'recipes-list', 'get',
+             FEED + '&is_in_shopping_cart=1', 'user'),
+    Scenario('Лента: популярные', 'recipes-list', 'get',
+             FEED + '&ordering=popular', 'user'),
+    Scenario('Лента: поиск', 'recipes-list', 'get',
+             FEED + '&search={query}', 'user'),
+    Scenario('Лента: из имеющихся', 'recipes-list', 'get',
+             FEED + '&has_ingredients={ingredients}&missing_max=3', 'user'),
+    Scenario('Рецепт', 'recipes-detail', 'get', '/api/recipes/{recipe}/',
+             'user'),
+    Scenario('Похожие', 'recipes-similar', 'get',
+             '/api/recipes/{recipe}/similar/', 'user'),
+    Scenario('Рекомендации', 'recipes-recommended', 'get',
+             '/api/recipes/recommended/', 'user'),
+    Scenario('Список покупок: txt', 'recipes-download_shopping_cart', 'get',
+             '/api/recipes/download_shopping_cart/?format=txt', 'user'),
+    Scenario('Список покупок: csv', 'recipes-download_shopping_cart', 'get',
+             '/api/recipes/download_shopping_cart/?format=csv', 'user'),
+    Scenario('Список покупок: pdf', 'recipes-download_shopping_cart', 'get',
+             '/api/recipes/download_shopping_cart/?format=pdf', 'user'),
+    Scenario('Пользователи', 'foodgramuser-list', 'get', '/api/users/',
+             'user'),
+    Scenario('Профиль', 'foodgramuser-me', 'get', '/api/users/me/', 'user'),
+    Scenario('Пользователь', 'foodgramuser-detail', 'get',
+             '/api/users/{author}/', 'user'),
+    Scenario('Подписки', 'users-subscriptions', 'get',
+             '/api/users/subscriptions/?recipes_limit=3', 'user'),
+    Scenario('Метрики', 'metrics', 'get', '/api/_metrics/', 'admin'),
+    Scenario('Избранное: добавить', 'recipes-action_with_favorits', 'post',
+             '/api/recipes/{free_recipe}/favorite/', 'user'),
+    Scenario('Избранное: удалить', 'recipes-action_with_favorits', 'delete',
+             '/api/recipes/{free_recipe}/favorite/', 'user'),
+    Scenario('Избранное: добавить пачку', 'recipes-favorite_batch', 'post',
+             '/api/recipes/favorite/', 'user',
+             lambda context: {'recipes': context['batch']}),
+    Scenario('Избранное: удалить пачку', 'recipes-favorite_batch', 'delete',
+             '/api/recipes/favorite/', 'user',
+             lambda context: {'recipes': context['batch']}),
+    Scenario('Список покупок: добавить', 'recipes-shopping_cart_actions',
+             'post', '/api/recipes/{free_recipe}/shopping_cart/', 'user',
+             lambda context: {'servings': 2}),
+    Scenario('Список покупок: порции', 'recipes-shopping_cart_actions',
+             'patch', '/api/recipes/{free_recipe}/shopping_cart/', 'user',
+             lambda context: {'servings': 3}),
+    Scenario('Список покупок: удалить', 'recipes-shopping_cart_actions',
+             'delete', '/api/recipes/{free_recipe}/shopping_cart/', 'user'),
+    Scenario('Список покупок: добавить пачку', 'recipes-shopping_cart_batch',
+             'post', '/api/recipes/shopping_cart/', 'user',
+             lambda context: {'recipes': context['batch']}),
+    Scenario('Список покупок: удалить пачку', 'recipes-shopping_cart_batch',
+             'delete', '/api/recipes/shopping_cart/', 'user',
+             lambda context: {'recipes': context['batch']}),
+    Scenario('Подписаться', 'users-subscribe', 'post',
+             '/api/users/{free_author}/subscribe/', 'user'),
+    Scenario('Отписаться', 'users-subscribe', 'delete',
+             '/api/users/{free_author}/subscribe/', 'user'),
+    Scenario('Рецепт: изменить', 'recipes-detail', 'patch',
+             '/api/recipes/{own_recipe}/', 'author',
+             lambda context: {'text': f'Правка для бенчмарка '
+                                      f'{context["run"]}-{context["index"]}'}),
+    Scenario('Регистрация', 'foodgramuser-list', 'post', '/api/users/',
+             'anonymous',
+             lambda context: {
+                 'email': f'run{context["run"]}-{context["index"]}'
+                          f'{RUN_EMAIL}',
+                 'username': f'run{context["run"]}-{context["index"]}',
+                 'first_name': 'Бенчмарк',
+                 'last_name': 'Бенчмарк',
+                 'password': RUN_PASSWORD}),
+    Scenario('Вход', 'login', 'post', '/api/auth/token/login/', 'anonymous',
+             lambda context: {'email': context['admin_email'],
+                              'password': RUN_PASSWORD}),
+    Scenario('Выход', 'logout', 'post', '/api/auth/token/logout/', 'token'),
+)
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'],
+                                capture_output=True, text=True,
+                                cwd=settings.BASE_DIR)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def api_url_names():
+    names = set()
+    resolver = get_resolver()
+    for pattern in resolver.namespace_dict['api'][1].url_patterns:
+        patterns = getattr(pattern, 'url_patterns', [pattern])
+        names.update(item.name for item in patterns if item.name)
+    return names
+
+
+class Command(BaseCommand):
+    help = ('Бенчмарк эндпоинтов API на наполненной базе: задержки, '
+            'число запросов к БД и выделенная память для каждого сценария')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--username',
+                            help='Пользователь для авторизованных запросов')
+        parser.add_argument('--only', nargs='+', default=(),
+                            help='Имена маршрутов, например recipes-list')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument('--compare',
+                            help='Файл с результатами прошлого запуска')
+
+    def handle(self, *args, **options):
+        scenarios = [scenario for scenario in SCENARIOS
+                     if not options['only']
+                     or scenario.url_name in options['only']]
+        if not scenarios:
+            raise CommandError('Нет сценариев для выбранных маршрутов')
+        random.seed(options['seed'])
+        self.run_id = timezone.now().strftime('%Y%m%d%H%M%S')
+        hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        self.original_texts = {}
+        try:
+            with override_settings(ALLOWED_HOSTS=hosts):
+                self.prepare(options)
+                results = [self.run_scenario(scenario, options)
+                           for scenario in scenarios]
+        finally:
+            FoodgramUser.objects.filter(email__endswith=RUN_EMAIL).delete()
+            self.restore_texts()
+        self.report(results)
+        uncovered = sorted(api_url_names() - {
+            scenario.url_name for scenario in SCENARIOS})
+        self.stdout.write(f'Не измеряются: {", ".join(uncovered)}')
+        report = {'meta': self.metadata(options), 'uncovered': uncovered,
+                  'results': results}
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    def prepare(self, options):
+        self.recipes = Recipe.objects.filter(
+            author__email__endswith=SEED_EMAIL)
+        if not self.recipes.exists():
+            raise CommandError(
+                'Нет данных seed_benchmark. Сценарии меняют избранное, '
+                'подписки и рецепты, поэтому запускаются только от имени '
+                f'пользователей {SEED_EMAIL}')
+        users = FoodgramUser.objects.filter(email__endswith=SEED_EMAIL)
+        if options['username']:
+            self.user = users.filter(username=options['username']).first()
+            if self.user is None:
+                raise CommandError('Пользователь не найден')
+        else:
+            self.user = users.annotate(
+                activity=Count('user_favorites', distinct=True)
+                + Count('shopping_cart', distinct=True)).order_by(
+                '-activity', 'pk').first()
+        self.author = users.order_by('-recipes_count', 'pk').first()
+        admin = FoodgramUser.objects.create_user(
+            username=f'run{self.run_id}-admin',
+            email=f'run{self.run_id}-admin{RUN_EMAIL}',
+            first_name='Бенчмарк', last_name='Бенчмарк',
+            password=RUN_PASSWORD, is_staff=True)
+        self.clients = {'anonymous': APIClient()}
+        for role, user in (('user', self.user), ('author', self.author),
+                           ('admin', admin)):
+            self.clients[role] = APIClient()
+            self.clients[role].force_authenticate(user)
+        self.pools = self.build_pools(
+            options['warmup'] + 1 + options['repeat'], admin)
+
+    def build_pools(self, size, admin):
+        recipes = list(self.recipes.values_list('pk', 'name'))
+        taken = set(Favorite.objects.filter(
+            user=self.user).values_list('recipe_id', flat=True))
+        taken.update(ShoppingCart.objects.filter(
+            user=self.user).values_list('recipe_id', flat=True))
+        free_recipes = [pk for pk, _ in recipes if pk not in taken]
+        free_authors = list(FoodgramUser.objects.filter(
+            email__endswith=SEED_EMAIL).exclude(pk=self.user.pk).exclude(
+            followed_by__user=self.user).values_list('pk', flat=True))
+        if (len(free_recipes) < size * BATCH_SIZE + size
+                or len(free_authors) < size):
+            raise CommandError('Недостаточно данных, уменьшите --repeat '
+                               'или наполните базу заново')
+        random.shuffle(free_recipes)
+        self.original_texts = dict(Recipe.objects.filter(
+            author=self.author).values_list('pk', 'text'))
+        own_recipes = list(self.original_texts)
+        tags = list(Tag.objects.values_list('pk', 'slug'))
+        ingredients = list(Ingredient.objects.values_list('pk', 'name'))
+        return [{
+            'index': index,
+            'run': self.run_id,
+            'admin_email': admin.email,
+            'recipe': random.choice(recipes)[0],
+            'free_recipe': free_recipes[index],
+            'batch': free_recipes[size + index * BATCH_SIZE:
+                                  size + (index + 1) * BATCH_SIZE],
+            'free_author': free_authors[index],
+            'own_recipe': random.choice(own_recipes),
+            'author': self.author.pk,
+            'tag_id': random.choice(tags)[0],
+            'tag': random.choice(tags)[1],
+            'ingredient': random.choice(ingredients)[0],
+            'ingredient_name': random.choice(ingredients)[1],
+            'ingredients': ','.join(str(pk) for pk, _ in random.sample(
+                ingredients, min(10, len(ingredients)))),
+            'query': random.choice(recipes)[1],
+            'page': random.randint(1, 10),
+        } for index in range(size)]
+
+    def restore_texts(self):
+        for recipe in Recipe.objects.filter(pk__in=self.original_texts):
+            text = self.original_texts[recipe.pk]
+            if recipe.text != text:
+                recipe.text = text
+                recipe.save(update_fields=['text', 'updated_at'])
+                update_search_vectors(Recipe.objects.filter(pk=recipe.pk))
+
+    def client_for(self, scenario, context):
+        if scenario.role != 'token':
+            return self.clients[scenario.role]
+        response = self.clients['anonymous'].post(
+            '/api/auth/token/login/',
+            {'email': context['admin_email'], 'password': RUN_PASSWORD},
+            format='json')
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Token {response.data["auth_token"]}')
+        return client
+
+    def request(self, client, scenario, context):
+        path = quote(scenario.path.format(**context), safe='/?=&,')
+        data = scenario.data(context) if scenario.data else None
+        start = time.perf_counter()
+        response = getattr(client, scenario.method)(path, data,
+                                                    format='json')
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return time.perf_counter() - start, response.status_code
+
+    def run_scenario(self, scenario, options):
+        contexts = iter(self.pools)
+        for context in [next(contexts) for _ in range(options['warmup'])]:
+            self.request(self.client_for(scenario, context), scenario,
+                         context)
+        context = next(contexts)
+        client = self.client_for(scenario, context)
+        reset_queries()
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            self.request(client, scenario, context)
+        query_count = len(queries)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        timings, statuses = [], Counter()
+        for context in contexts:
+            timing, status = self.request(
+                self.client_for(scenario, context), scenario, context)
+            timings.append(timing * 1000)
+            statuses[status] += 1
+        return {
+            'name': scenario.name,
+            'route': scenario.url_name,
+            'method': scenario.method.upper(),
+            'path': scenario.path,
+            'role': scenario.role,
+            'statuses': {str(code): count
+                         for code, count in sorted(statuses.items())},
+            'queries': query_count,
+            'memory_kb': round(peak / 1024, 1),
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'p99_ms': round(percentile(timings, 0.99), 2),
+            'mean_ms': round(statistics.mean(timings), 2),
+            'min_ms': round(min(timings), 2),
+            'max_ms': round(max(timings), 2),
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"сценарий":<34} {"метод":>6} {"p50, мс":>8} {"p95, мс":>8} '
+            f'{"p99, мс":>8} {"запросов":>8} {"память, КБ":>10}  статусы')
+        for result in results:
+            statuses = ' '.join(f'{code}×{count}' for code, count
+                                in result['statuses'].items())
+            self.stdout.write(
+                f'{result["name"]:<34} {result["method"]:>6} '
+                f'{result["p50_ms"]:>8.2f} {result["p95_ms"]:>8.2f} '
+                f'{result["p99_ms"]:>8.2f} {result["queries"]:>8} '
+                f'{result["memory_kb"]:>10.1f}  {statuses}')
+
+    def metadata(self, options):
+        return {
+            'commit': git_commit(),
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'user': self.user.username,
+            'repeat': options['repeat'],
+            'warmup': options['warmup'],
+            'seed': options['seed'],
+            'data': {
+                'users': FoodgramUser.objects.count(),
+                'recipes': Recipe.objects.count(),
+                'ingredients': Ingredient.objects.count(),
+                'favorites': Favorite.objects.count(),
+                'shopping_carts': ShoppingCart.objects.count(),
+                'subscriptions': Subscription.objects.count(),
+            },
+        }
+
+    def compare(self, filename, results):
+        with open(filename, encoding='utf-8') as previous_file:
+            previous = {(item['name'], item['method']): item
+                        for item in json.load(previous_file)['results']}
+        self.stdout.write(f'\n{"сценарий":<34} {"p50 было":>9} '
+                          f'{"p50 стало":>10} {"изменение":>10} '
+                          f'{"запросов":>10}')
+        for result in results:
+            old = previous.get((result['name'], result['method']))
+            if old is None:
+                continue
+            change = (result['p50_ms'] / old['p50_ms'] - 1) * 100
+            self.stdout.write(
+                f'{result["name"]:<34} {old["p50_ms"]:>9.2f} '
+                f'{result["p50_ms"]:>10.2f} {change:>+9.1f}% '
+                f'{old["queries"]:>4} → {result["queries"]:<4}')
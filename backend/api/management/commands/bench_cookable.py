@@ -0,0 +1,85 @@
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, Q
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from api.benchmarks import (
+    create_ingredients, create_recipes, create_users, measure, rollback)
+from recipes.caches import RecipeIngredientIndex
+from recipes.models import Ingredient, Recipe
+
+
+class Command(BaseCommand):
+    help = ('Поиск рецептов по имеющимся ингредиентам: индекс '
+            'ингредиент → рецепты против агрегирующего запроса')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--per-recipe', type=int, default=7)
+        parser.add_argument('--have', type=int, default=20)
+        parser.add_argument('--missing-max', type=int, default=2)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rollback():
+            ingredients = create_ingredients(options['ingredients'])
+            missing = options['recipes'] - Recipe.objects.count()
+            if missing > 0:
+                create_recipes(create_users(50), missing, ingredients,
+                               per_recipe=options['per_recipe'])
+            self.client = APIClient()
+            self.client.force_authenticate(
+                create_users(1, prefix='cookable')[0])
+            hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+            with override_settings(ALLOWED_HOSTS=hosts):
+                self.run(options)
+
+    def aggregate(self, have, missing_max):
+        return list(Recipe.objects.annotate(
+            total=Count('ingredientes'),
+            matched=Count('ingredientes',
+                          filter=Q(ingredientes__ingredient__in=have)),
+        ).filter(
+            matched__gt=0, total__lte=F('matched') + missing_max
+        ).values_list('pk', flat=True))
+
+    def request(self, have, missing_max, page):
+        response = self.client.get('/api/recipes/', {
+            'has_ingredients': ','.join(str(pk) for pk in have),
+            'missing_max': missing_max, 'page': page})
+        if response.status_code != 200:
+            raise CommandError(f'Ответ {response.status_code}')
+        return response
+
+    def run(self, options):
+        have = random.sample(list(Ingredient.objects.values_list(
+            'pk', flat=True)), options['have'])
+        missing_max = options['missing_max']
+        index = RecipeIngredientIndex()
+        start = time.perf_counter()
+        index.build()
+        self.stdout.write(f'Рецептов: {Recipe.objects.count()}, '
+                          f'построение индекса: '
+                          f'{(time.perf_counter() - start) * 1000:.0f} мс')
+        index.ensure = lambda: None
+        found = len(index.cookable(have, missing_max))
+        self.stdout.write(f'Ингредиентов в запросе: {len(have)}, '
+                          f'найдено рецептов: {found}')
+        last_page = max((found + 5) // 6, 1)
+        self.request(have, missing_max, 1)
+        modes = (
+            ('index', lambda: index.cookable(have, missing_max)),
+            ('aggregate', lambda: self.aggregate(have, missing_max)),
+            ('http', lambda: self.request(have, missing_max, 1)),
+            ('http last', lambda: self.request(have, missing_max,
+                                               last_page)),
+        )
+        for name, func in modes:
+            best, median = measure(func, options['repeat'])
+            self.stdout.write(f'{name:>10}: min {best * 1000:.2f} мс, '
+                              f'median {median * 1000:.2f} мс')
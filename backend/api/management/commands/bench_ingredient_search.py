@@ -0,0 +1,49 @@
+import random
+
+from django.core.management.base import BaseCommand
+
+from api.benchmarks import create_ingredients, measure, rollback
+from api.filters import IngredientFilter
+from recipes.caches import ingredient_index
+from recipes.models import Ingredient
+
+
+class Command(BaseCommand):
+    help = ('Сравнение поиска ингредиентов по префиксу через ORM-фильтр '
+            'и через индекс в памяти')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-ingredients', type=int, default=2000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rollback():
+            missing = options['min_ingredients'] - Ingredient.objects.count()
+            if missing > 0:
+                create_ingredients(missing)
+            self.run(options)
+
+    def run(self, options):
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        prefixes = [name[:random.randint(1, 3)]
+                    for name in random.choices(names, k=options['queries'])]
+
+        def orm():
+            for prefix in prefixes:
+                list(IngredientFilter(
+                    {'name': prefix}, queryset=Ingredient.objects.all()).qs)
+
+        def index():
+            for prefix in prefixes:
+                ingredient_index.search(prefix)
+
+        ingredient_index.ensure()
+        self.stdout.write(f'Ингредиентов: {len(names)}, '
+                          f'запросов в серии: {len(prefixes)}')
+        for name, func in (('ORM', orm), ('индекс', index)):
+            best, median = measure(func, options['repeat'])
+            self.stdout.write(
+                f'{name:>8}: min {best * 1000:.1f} мс, '
+                f'median {median * 1000:.1f} мс, '
+                f'{median / len(prefixes) * 1e6:.0f} мкс на запрос')
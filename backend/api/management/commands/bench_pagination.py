@@ -0,0 +1,58 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.benchmarks import create_recipes, create_users, measure, rollback
+from api.paginations import FeedPagination
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = ('Задержка получения глубокой страницы ленты рецептов '
+            'при постраничной и курсорной пагинации')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', type=int, default=500)
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if options['page'] < 1 or options['limit'] < 1:
+            raise CommandError('--page и --limit должны быть не меньше 1')
+        with rollback():
+            required = options['page'] * options['limit']
+            missing = required - Recipe.objects.count()
+            if missing > 0:
+                create_recipes(create_users(50), missing)
+            self.run(options)
+
+    def paginate(self, query):
+        request = Request(APIRequestFactory().get('/api/recipes/', query))
+        queryset = Recipe.objects.for_feed(AnonymousUser())
+        paginator = FeedPagination()
+        page = paginator.paginate_queryset(queryset, request)
+        return paginator, page
+
+    def run(self, options):
+        page, limit = options['page'], options['limit']
+        offset = (page - 1) * limit
+        cursor = {}
+        if offset:
+            paginator, _ = self.paginate({'pagination': 'cursor',
+                                          'count': 'none'})
+            anchor = Recipe.objects.order_by('-pub_date', '-pk')[offset - 1]
+            cursor = {'cursor': paginator.keyset.encode_cursor(
+                anchor, reverse=False)}
+        modes = (
+            ('page', {'page': page, 'limit': limit}),
+            ('cursor', {**cursor, 'pagination': 'cursor', 'limit': limit}),
+            ('cursor+count', {**cursor, 'pagination': 'cursor',
+                              'limit': limit, 'count': 'exact'}),
+        )
+        self.stdout.write(f'Страница {page}, по {limit} рецептов')
+        for name, query in modes:
+            best, median = measure(lambda: self.paginate(query),
+                                   options['repeat'])
+            self.stdout.write(f'{name:>14}: min {best * 1000:.2f} мс, '
+                              f'median {median * 1000:.2f} мс')
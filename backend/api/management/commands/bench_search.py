@@ -0,0 +1,50 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+
+from api.benchmarks import (
+    create_ingredients, create_recipes, create_users, measure, rollback)
+from recipes.models import Recipe
+from recipes.search import (
+    full_text_search_supported, search_recipes, substring_search,
+    update_search_vectors)
+
+
+class Command(BaseCommand):
+    help = ('Задержка поиска рецептов по названию, описанию и '
+            'ингредиентам: полнотекстовый поиск против icontains')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--query', default='ингредиент 42')
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rollback():
+            missing = options['recipes'] - Recipe.objects.count()
+            if missing > 0:
+                create_recipes(create_users(50), missing,
+                               create_ingredients(500), per_recipe=5)
+                update_search_vectors(Recipe.objects.all())
+            self.run(options)
+
+    def fetch(self, queryset, limit):
+        queryset = queryset.for_feed(AnonymousUser())
+        return list(queryset[:limit])
+
+    def run(self, options):
+        value, limit = options['query'], options['limit']
+        modes = [('icontains', lambda: self.fetch(
+            substring_search(Recipe.objects.all(), value), limit))]
+        if full_text_search_supported():
+            modes.append(('full-text', lambda: self.fetch(
+                search_recipes(Recipe.objects.all(), value), limit)))
+        else:
+            self.stdout.write('Полнотекстовый поиск доступен только '
+                              'в PostgreSQL, измеряется только icontains')
+        self.stdout.write(f'Рецептов: {Recipe.objects.count()}, '
+                          f'запрос «{value}»')
+        for name, func in modes:
+            best, median = measure(func, options['repeat'])
+            self.stdout.write(f'{name:>10}: min {best * 1000:.2f} мс, '
+                              f'median {median * 1000:.2f} мс')
@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+from django.test.utils import CaptureQueriesContext
+
+from api.benchmarks import (
+    create_ingredients, create_recipes, create_users, measure, rollback)
+from api.utils import ShoppingListItem, process_shopping_list
+from recipes.models import Recipe, RecipeIngredient, ShoppingCart
+from recipes.shopping_list import rebuild_lines
+
+
+def legacy_process_shopping_list(recipe_list):
+    ingredients = {}
+    for recipe in recipe_list:
+        for ingredient in (recipe.ingredientes.select_related
+                           ('ingredient').all()):
+            piece = (ingredient.ingredient.name,
+                     ingredient.ingredient.measurement_unit)
+            if piece not in ingredients:
+                ingredients[piece] = 0
+            ingredients[piece] += ingredient.amount
+
+    return [ShoppingListItem(name, amount, measurement_unit)
+            for ((name, measurement_unit), amount) in ingredients.items()]
+
+
+def aggregate_shopping_list(user):
+    ingredients = (
+        RecipeIngredient.objects
+        .filter(recipe__shoppingcart__user=user)
+        .annotate(
+            name=F('ingredient__name'),
+            unit=Coalesce('ingredient__unit_conversion__base_unit',
+                          'ingredient__measurement_unit'),
+        )
+        .values('name', 'unit')
+        .annotate(total=Sum(
+            F('amount') * F('recipe__shoppingcart__servings')
+            * Coalesce('ingredient__unit_conversion__factor', 1)))
+        .order_by('name', 'unit')
+    )
+    return [ShoppingListItem(item['name'], item['total'], item['unit'])
+            for item in ingredients]
+
+
+class Command(BaseCommand):
+    help = ('Сравнение способов сборки списка покупок '
+            'для корзин разного размера')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+',
+                            default=[10, 100, 1000])
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"рецептов":>10} {"способ":>8} {"запросов":>9} '
+            f'{"min, мс":>10} {"median, мс":>11}')
+        for size in options['sizes']:
+            with rollback():
+                self.run_size(size, options)
+
+    def run_size(self, size, options):
+        user, = create_users(1)
+        ingredients = create_ingredients(200)
+        recipes = create_recipes([user], size, ingredients,
+                                 options['ingredients_per_recipe'])
+        ShoppingCart.objects.bulk_create(
+            ShoppingCart(user=user, recipe=recipe) for recipe in recipes)
+        rebuild_lines([user.pk])
+        paths = (
+            ('старый', lambda: legacy_process_shopping_list(
+                Recipe.objects.filter(shoppingcart__user=user))),
+            ('агрегат', lambda: aggregate_shopping_list(user)),
+            ('новый', lambda: process_shopping_list(user)),
+        )
+        for name, func in paths:
+            with CaptureQueriesContext(connection) as queries:
+                func()
+            best, median = measure(func, options['repeat'])
+            self.stdout.write(
+                f'{size:>10} {name:>8} {len(queries):>9} '
+                f'{best * 1000:>10.1f} {median * 1000:>11.1f}')
@@ -0,0 +1,134 @@
+import re
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.filters import RecipeFilter
+from api.utils import shopping_list_lines
+from recipes.caches import tag_registry
+from recipes.models import Favorite, Recipe
+from users.models import FoodgramUser
+
+SEQUENTIAL_SCANS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(\w+)\b(?! USING)'),
+}
+
+
+class Command(BaseCommand):
+    help = ('Планы выполнения основных запросов API (EXPLAIN ANALYZE). '
+            'Отмечает запросы с последовательным чтением таблиц')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Имя пользователя, от лица '
+                                           'которого строятся запросы')
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument('--allow', nargs='*', default=[],
+                            help='Таблицы, которые можно читать целиком')
+        parser.add_argument('--disable-seqscan', action='store_true',
+                            help='SET enable_seqscan = off: показывает '
+                                 'запросы без подходящего индекса даже на '
+                                 'маленькой базе (только PostgreSQL)')
+        parser.add_argument('--no-analyze', action='store_true',
+                            help='Только план, без выполнения запросов')
+        parser.add_argument('--fail', action='store_true',
+                            help='Завершиться с ошибкой, если найдено '
+                                 'последовательное чтение')
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        flagged = []
+        with transaction.atomic():
+            if (options['disable_seqscan']
+                    and connection.vendor == 'postgresql'):
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            for name, (sql, params) in self.canonical_queries(
+                    user, options['limit']):
+                plan = self.explain(sql, params, not options['no_analyze'])
+                tables = self.sequential_scans(plan) - set(options['allow'])
+                self.report(name, plan, tables, options['verbosity'])
+                if tables:
+                    flagged.append(name)
+        if flagged and options['fail']:
+            raise CommandError(
+                f'Последовательное чтение в запросах: {", ".join(flagged)}')
+
+    def get_user(self, username):
+        if username:
+            user = FoodgramUser.objects.filter(username=username).first()
+        else:
+            user = FoodgramUser.objects.filter(
+                pk=Favorite.objects.values('user')[:1]
+            ).first() or FoodgramUser.objects.first()
+        if user is None:
+            raise CommandError('Пользователь не найден')
+        return user
+
+    def canonical_queries(self, user, limit):
+        request = SimpleNamespace(user=user)
+        feed = Recipe.objects.for_feed(user)
+
+        def filtered(**data):
+            queryset = RecipeFilter(data, queryset=feed, request=request).qs
+            return queryset.query.sql_with_params()
+
+        def sliced(queryset):
+            return queryset[:limit].query.sql_with_params()
+
+        recipe = Recipe.objects.order_by('-pk').values_list(
+            'pk', 'author_id').first() or (0, 0)
+        authors = list(FoodgramUser.objects.filter(
+            followed_by__user=user).values_list('pk', flat=True)[:limit])
+        latest = Recipe.objects.latest_by_author(authors or [0], 3)
+        queries = [
+            ('Лента рецептов', sliced(feed)),
+            ('Рецепты автора', filtered(author=recipe[1])),
+            ('Избранное', filtered(is_favorited=True)),
+            ('Рецепты в списке покупок', filtered(is_in_shopping_cart=True)),
+            ('Популярные рецепты', filtered(ordering='popular')),
+            ('Поиск рецептов', filtered(search='суп')),
+            ('Подписки', sliced(FoodgramUser.objects.filter(
+                followed_by__user=user))),
+            ('Рецепты подписок', (latest.raw_query, latest.params)),
+            ('Список покупок',
+             shopping_list_lines(user).query.sql_with_params()),
+            ('Похожие рецепты', sliced(
+                Recipe.objects.minified().similar_to(recipe[0]))),
+            ('Рекомендации', sliced(
+                Recipe.objects.minified().recommended_for(user))),
+        ]
+        tags = tag_registry.all()
+        if tags:
+            queries.insert(1, ('Рецепты по тегу',
+                               filtered(tags=[tags[0].slug])))
+        return queries
+
+    def explain(self, sql, params, analyze):
+        if connection.vendor == 'postgresql':
+            prefix = 'EXPLAIN (ANALYZE, BUFFERS) ' if analyze else 'EXPLAIN '
+        else:
+            prefix = 'EXPLAIN QUERY PLAN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def sequential_scans(self, plan):
+        pattern = SEQUENTIAL_SCANS.get(connection.vendor)
+        if pattern is None:
+            return set()
+        tables = set(connection.introspection.table_names())
+        return {table for line in plan for table in pattern.findall(line)
+                if table in tables}
+
+    def report(self, name, plan, tables, verbosity):
+        if tables:
+            self.stdout.write(self.style.WARNING(
+                f'{name}: последовательное чтение {", ".join(sorted(tables))}'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{name}: ok'))
+        if tables or verbosity > 1:
+            for line in plan:
+                self.stdout.write(f'    {line}')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.caching import recipe_feed_cache
+
+
+class Command(BaseCommand):
+    help = 'Статистика кэша ленты рецептов для анонимных пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help='Обнулить счетчики')
+
+    def handle(self, *args, **options):
+        if not recipe_feed_cache.shared:
+            raise CommandError(
+                'Кэш ответов хранится в памяти процесса, счетчики воркеров '
+                'отсюда не видны. Задайте REDIS_URL или смотрите '
+                '/api/_metrics/ на нужном воркере')
+        stats = recipe_feed_cache.stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total * 100 if total else 0
+        self.stdout.write(f'Попаданий: {stats["hits"]}, '
+                          f'промахов: {stats["misses"]}, '
+                          f'доля попаданий: {ratio:.1f}%')
+        if options['reset']:
+            recipe_feed_cache.reset_stats()
+            self.stdout.write('Счетчики обнулены')
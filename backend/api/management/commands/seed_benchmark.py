@@ -0,0 +1,130 @@
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.benchmarks import (
+    create_ingredients, create_recipes, create_relations, create_tags,
+    create_users, zipf_choices, zipf_sample, zipf_weights)
+from recipes.counters import recount
+from recipes.models import (
+    Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag)
+from recipes.recommendations import update_similarities
+from recipes.search import update_search_vectors
+from recipes.shopping_list import rebuild_lines
+from recipes.trending import update_trending_scores
+from recipes.versions import bump_version
+from users.models import FoodgramUser, Subscription
+
+
+class Command(BaseCommand):
+    help = ('Наполнение базы синтетическими данными для бенчмарков: '
+            'пользователи, рецепты, избранное, списки покупок и подписки '
+            'с популярностью по закону Ципфа')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--tags', type=int, default=10)
+        parser.add_argument('--per-recipe', type=int, default=8,
+                            help='Ингредиентов в одном рецепте')
+        parser.add_argument('--favorites', type=int, default=100000)
+        parser.add_argument('--carts', type=int, default=20000)
+        parser.add_argument('--subscriptions', type=int, default=20000)
+        parser.add_argument('--zipf', type=float, default=1.1,
+                            help='Показатель распределения Ципфа')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--clear', action='store_true',
+                            help='Удалить ранее созданные данные')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['clear']:
+            self.clear(prefix)
+        elif FoodgramUser.objects.filter(
+                email__endswith='@benchmark.local',
+                username__startswith=f'{prefix}-').exists():
+            raise CommandError('Данные для бенчмарков уже созданы, '
+                               'используйте --clear')
+        random.seed(options['seed'])
+        started = time.perf_counter()
+        self.seed(options)
+        self.prepare()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано за {time.perf_counter() - started:.1f} с: '
+            f'пользователей {FoodgramUser.objects.count()}, '
+            f'рецептов {Recipe.objects.count()}, '
+            f'избранных {Favorite.objects.count()}, '
+            f'в списках покупок {ShoppingCart.objects.count()}, '
+            f'подписок {Subscription.objects.count()}'))
+
+    def clear(self, prefix):
+        FoodgramUser.objects.filter(email__endswith='@benchmark.local',
+                                    username__startswith=prefix).delete()
+        Ingredient.objects.filter(name__startswith=prefix).delete()
+        Tag.objects.filter(slug__startswith=f'{prefix}-').delete()
+
+    def seed(self, options):
+        prefix, exponent = options['prefix'], options['zipf']
+        users = create_users(options['users'], prefix)
+        tags = create_tags(options['tags'], prefix)
+        ingredients = create_ingredients(options['ingredients'], prefix)
+        authorship = zipf_choices(users, zipf_weights(len(users), exponent),
+                                  options['recipes'])
+        recipes = create_recipes(authorship, options['recipes'],
+                                 prefix=prefix)
+        authors = list(set(authorship))
+        self.spread_dates(Recipe, recipes, 'pub_date', days=365)
+        self.add_contents(recipes, tags, ingredients, options)
+        create_relations(Favorite, users, recipes, options['favorites'],
+                         exponent)
+        self.spread_dates(Favorite, list(Favorite.objects.filter(
+            user__email__endswith='@benchmark.local',
+            user__username__startswith=f'{prefix}-')), 'added_at', days=30)
+        create_relations(ShoppingCart, users, recipes, options['carts'],
+                         exponent, servings=lambda: random.randint(1, 4))
+        create_relations(Subscription, users, authors,
+                         options['subscriptions'], exponent,
+                         target_field='author')
+
+    def add_contents(self, recipes, tags, ingredients, options):
+        exponent = options['zipf']
+        tag_weights = zipf_weights(len(tags), exponent)
+        ingredient_weights = zipf_weights(len(ingredients), exponent)
+        recipe_tags = []
+        recipe_ingredients = []
+        for recipe in recipes:
+            recipe_tags.extend(
+                Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag.pk)
+                for tag in zipf_sample(tags, tag_weights,
+                                       random.randint(1, 3)))
+            recipe_ingredients.extend(
+                RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                                 amount=random.randint(1, 500))
+                for ingredient in zipf_sample(
+                    ingredients, ingredient_weights, options['per_recipe']))
+        Recipe.tags.through.objects.bulk_create(recipe_tags, batch_size=1000)
+        RecipeIngredient.objects.bulk_create(recipe_ingredients,
+                                             batch_size=1000)
+
+    def spread_dates(self, model, objects, field, days):
+        now = timezone.now()
+        for instance in objects:
+            setattr(instance, field, now - timedelta(
+                seconds=random.randrange(days * 24 * 3600)))
+        model.objects.bulk_update(objects, [field], batch_size=1000)
+
+    def prepare(self):
+        list(recount())
+        rebuild_lines(list(ShoppingCart.objects.values_list(
+            'user_id', flat=True).distinct()))
+        update_trending_scores()
+        update_search_vectors(Recipe.objects.all())
+        update_similarities(settings.SIMILAR_RECIPES_COUNT)
+        bump_version('recipes', 'tags', 'ingredients', 'users',
+                     'recipe_ingredients', 'recipe_features')
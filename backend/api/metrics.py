@@ -0,0 +1,87 @@
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger('api.metrics')
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+PERCENTILES = (50, 95, 99)
+
+
+class RequestMetrics:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_started = None
+        self.render_time = 0.0
+
+    def finish_render(self, response):
+        self.render_time = time.perf_counter() - self.render_started
+        return response
+
+
+def query_timer(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        metrics.queries += 1
+        metrics.db_time += duration
+        if duration * 1000 >= settings.API_METRICS_SLOW_QUERY_MS:
+            logger.warning('Медленный запрос (%.1f мс): %s',
+                           duration * 1000, sql)
+
+
+def install_query_timer(connection, **kwargs):
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_timer)
+
+
+def percentile(values, rank):
+    return values[max(math.ceil(len(values) * rank / 100) - 1, 0)]
+
+
+class MetricsRegistry:
+
+    def __init__(self, size):
+        self._lock = threading.Lock()
+        self._requests = defaultdict(int)
+        self._samples = defaultdict(
+            lambda: defaultdict(lambda: deque(maxlen=size)))
+
+    def record(self, view, **values):
+        with self._lock:
+            self._requests[view] += 1
+            for name, value in values.items():
+                self._samples[view][name].append(value)
+
+    def snapshot(self):
+        with self._lock:
+            samples = {view: {name: sorted(values)
+                              for name, values in metrics.items()}
+                       for view, metrics in self._samples.items()}
+            requests = dict(self._requests)
+        return {
+            view: {
+                'requests': requests[view],
+                **{name: {f'p{rank}': round(percentile(values, rank), 3)
+                          for rank in PERCENTILES}
+                   for name, values in metrics.items()},
+            }
+            for view, metrics in samples.items()
+        }
+
+
+registry = MetricsRegistry(settings.API_METRICS_SAMPLES)
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from recipes.versions import version_snapshot
+
+from .metrics import (
+    RequestMetrics, current_metrics, install_query_timer, registry)
+
+
+class VersionSnapshotMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with version_snapshot():
+            return self.get_response(request)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.API_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+        connection_created.connect(install_query_timer)
+        for connection in connections.all():
+            install_query_timer(connection)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        metrics, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def start(self):
+        metrics = RequestMetrics()
+        return metrics, current_metrics.set(metrics)
+
+    def process_template_response(self, request, response):
+        metrics = current_metrics.get()
+        if metrics is not None:
+            metrics.render_started = time.perf_counter()
+            response.add_post_render_callback(metrics.finish_render)
+        return response
+
+    def finish(self, request, response, metrics):
+        total = time.perf_counter() - metrics.started
+        match = request.resolver_match
+        registry.record(
+            match.view_name if match else 'unresolved',
+            total_ms=total * 1000,
+            db_ms=metrics.db_time * 1000,
+            render_ms=metrics.render_time * 1000,
+            queries=metrics.queries,
+        )
+        user = getattr(request, 'user', None)
+        if settings.DEBUG or user is not None and user.is_staff:
+            response['Server-Timing'] = ', '.join((
+                f'db;dur={metrics.db_time * 1000:.1f};'
+                f'desc="{metrics.queries} queries"',
+                f'render;dur={metrics.render_time * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ))
+        return response
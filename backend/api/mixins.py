@@ -0,0 +1,52 @@
+import hashlib
+
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers)
+from django.utils.http import http_date
+
+from recipes.versions import get_versions
+
+
+class NotModified(Exception):
+
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    conditional_actions = ('list', 'retrieve')
+    cache_control = {'private': True, 'no_cache': True}
+
+    def get_version_names(self):
+        raise NotImplementedError
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = self.last_modified = None
+        if (self.action not in self.conditional_actions
+                or request.method not in ('GET', 'HEAD')):
+            return
+        versions = get_versions(*self.get_version_names())
+        raw = ':'.join([request.get_host(), request.get_full_path(),
+                        *map(str, versions)])
+        self.etag = f'"{hashlib.md5(raw.encode()).hexdigest()}"'
+        self.last_modified = max(versions) // 1_000_000
+        response = get_conditional_response(
+            request, etag=self.etag, last_modified=self.last_modified)
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        if getattr(self, 'etag', None) and response.status_code in (200, 304):
+            response['ETag'] = self.etag
+            response['Last-Modified'] = http_date(self.last_modified)
+            patch_cache_control(response, **self.cache_control)
+            patch_vary_headers(response, ('Authorization',))
+        return response
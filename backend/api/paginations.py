@@ -1,5 +1,201 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from collections import OrderedDict
+from datetime import date
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class CustomPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class RankedQuerySet:
+
+    def __init__(self, queryset, ranked_ids):
+        self.queryset = queryset
+        self.ranked_ids = ranked_ids
+
+    def __len__(self):
+        return len(self.ranked_ids)
+
+    def __getitem__(self, index):
+        page_ids = self.ranked_ids[index]
+        objects = self.queryset.order_by().in_bulk(page_ids)
+        return [objects[pk] for pk in page_ids if pk in objects]
+
+
+def estimate_count(queryset):
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table])
+            return max(cursor.fetchone()[0], 0)
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Plan Rows']
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    count_query_param = 'count'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.model = queryset.model
+        self.ordering = self.get_ordering(queryset)
+        self.count = self.get_count(queryset)
+        position, self.reverse = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.build_filter(position))
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [self.invert(field) for field in ordering]
+        page_size = self.get_page_size(request)
+        page = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_more = len(page) > page_size
+        page = page[:page_size]
+        if self.reverse:
+            page.reverse()
+        self.has_next = has_more if not self.reverse else True
+        self.has_previous = has_more if self.reverse else position is not None
+        self.page = page
+        return page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_page_size(self, request):
+        try:
+            return max(int(request.query_params[self.page_size_query_param]),
+                       1)
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, queryset):
+        ordering = list(queryset.query.order_by
+                        or queryset.model._meta.ordering)
+        names = [field.lstrip('-') for field in ordering]
+        if 'pk' not in names and queryset.model._meta.pk.name not in names:
+            descending = bool(ordering) and ordering[0].startswith('-')
+            ordering.append('-pk' if descending else 'pk')
+        return ordering
+
+    def get_count(self, queryset):
+        mode = self.request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'none':
+            return None
+        return estimate_count(queryset)
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def build_filter(self, position):
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != self.reverse
+            lookup = 'lt' if descending else 'gt'
+            step = Q(**{f'{name}__{lookup}': position[index]})
+            for previous, value in zip(self.ordering[:index], position):
+                step &= Q(**{previous.lstrip('-'): value})
+            condition |= step
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if len(cursor['p']) != len(self.ordering):
+                raise ValueError
+            position = [self.to_python(field, value) for field, value
+                        in zip(self.ordering, cursor['p'])]
+            return position, bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def to_python(self, field, value):
+        name = field.lstrip('-')
+        if name == 'pk':
+            name = self.model._meta.pk.name
+        try:
+            return self.model._meta.get_field(name).to_python(value)
+        except FieldDoesNotExist:
+            return value
+
+    @staticmethod
+    def encode_value(value):
+        if isinstance(value, date):
+            return value.isoformat()
+        return value
+
+    def encode_cursor(self, instance, reverse):
+        position = [self.encode_value(getattr(instance, field.lstrip('-')))
+                    for field in self.ordering]
+        cursor = json.dumps({'p': position, 'r': int(reverse)},
+                            cls=DjangoJSONEncoder)
+        return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+    def get_cursor_link(self, instance, reverse):
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param,
+                                   self.encode_cursor(instance, reverse))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.get_cursor_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.get_cursor_link(self.page[0], reverse=True)
+
+
+class FeedPagination(CustomPagination):
+    mode_query_param = 'pagination'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        ranked = getattr(queryset, 'ranked', None)
+        if ranked is not None:
+            return super().paginate_queryset(ranked, request, view)
+        if (request.query_params.get(self.mode_query_param) == 'cursor'
+                or KeysetPagination.cursor_query_param
+                in request.query_params):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
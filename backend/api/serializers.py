@@ -1,19 +1,71 @@
+from django.conf import settings
+from django.db.models import prefetch_related_objects
 from django.db.transaction import atomic
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
 from recipes.models import (
-    Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag)
+    Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag,
+    recipe_prefetches)
 from users.models import FoodgramUser, Subscription
+from recipes.caches import related_recipe_index, tag_registry
+from recipes.counters import apply_counters
+from recipes.images import (
+    delete_image, get_storage, schedule_variants, store_image)
+from recipes.search import update_search_vectors
+from recipes.shopping_list import apply_cart_changes, apply_recipe_changes
 from recipes.validators import (
-    validate_name, validate_amount, validate_cooking_time)
+    validate_name, validate_amount, validate_cooking_time, validate_servings)
+from recipes.versions import bump_version
 
 
-class RecipeMinifiedSerializer(serializers.ModelSerializer):
+def get_recipes_limit(request):
+    recipes_limit = request.GET.get('recipes_limit')
+    if recipes_limit and recipes_limit.isdigit():
+        return int(recipes_limit)
+    return None
+
+
+class RecipeImageSerializer(serializers.Serializer):
+    image_srcset = serializers.SerializerMethodField()
+    image_preview = serializers.SerializerMethodField()
+
+    def build_url(self, name):
+        url = get_storage().url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_image_srcset(self, obj):
+        if not obj.image_variants:
+            return None
+        return {
+            image_format: ', '.join(
+                f'{self.build_url(name)} {width}w'
+                for width, name in sorted(variants.items(),
+                                          key=lambda item: int(item[0])))
+            for image_format, variants in obj.image_variants.items()
+        }
+
+    def get_image_preview(self, obj):
+        if not obj.image:
+            return None
+        variants = (obj.image_variants.get('webp')
+                    or obj.image_variants.get('default', {}))
+        widths = sorted(map(int, variants))
+        if not widths:
+            return self.build_url(obj.image.name)
+        width = next((width for width in widths
+                      if width >= settings.IMAGE_PREVIEW_WIDTH), widths[-1])
+        return self.build_url(variants[str(width)])
+
+
+class RecipeMinifiedSerializer(RecipeImageSerializer,
+                               serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_srcset', 'image_preview',
+                  'cooking_time')
         read_only_fields = ('id',)
 
 
@@ -31,6 +83,8 @@ class FoodgramUserSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         user = request.user
         if request.user.is_authenticated:
@@ -39,7 +93,7 @@ class FoodgramUserSerializer(serializers.ModelSerializer):
 
 class SubscriptionSerializer(FoodgramUserSerializer):
 
-    recipes_count = serializers.ReadOnlyField(source='recipes.count')
+    recipes_count = serializers.ReadOnlyField()
     recipes = serializers.SerializerMethodField()
 
     class Meta(FoodgramUserSerializer.Meta):
@@ -49,10 +103,13 @@ class SubscriptionSerializer(FoodgramUserSerializer):
         )
 
     def get_recipes(self, obj):
-        queryset = obj.recipes.all()
-        recipes_limit = self.context['request'].GET.get('recipes_limit')
-        if recipes_limit and recipes_limit.isdigit():
-            queryset = queryset[:int(recipes_limit)]
+        if hasattr(obj, 'latest_recipes'):
+            queryset = obj.latest_recipes
+        else:
+            queryset = obj.recipes.all()
+            recipes_limit = get_recipes_limit(self.context['request'])
+            if recipes_limit is not None:
+                queryset = queryset[:recipes_limit]
         return RecipeMinifiedSerializer(
             queryset, many=True, context=self.context
         ).data
@@ -124,11 +181,107 @@ class FavoriteCreateSerializer(serializers.Serializer):
 
 
 class ShoppingCartCreateSerializer(FavoriteCreateSerializer):
+    servings = serializers.IntegerField(default=1,
+                                        validators=[validate_servings])
     model = ShoppingCart
 
     class Meta(FavoriteCreateSerializer.Meta):
 
         model = ShoppingCart
+        fields = FavoriteCreateSerializer.Meta.fields + ('servings',)
+
+
+class ShoppingCartServingsSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = ShoppingCart
+        fields = ('recipe', 'servings')
+        read_only_fields = ('recipe',)
+
+
+class FavoriteBatchSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.RECIPE_BATCH_MAX_SIZE,
+        error_messages={
+            'max_length': 'Не больше {max_length} рецептов за запрос.'},
+    )
+    model = Favorite
+
+    def validate_recipes(self, value):
+        return list(dict.fromkeys(value))
+
+    def get_statuses(self):
+        user = self.context['request'].user
+        FoodgramUser.objects.select_for_update().filter(pk=user.pk).get()
+        ids = self.validated_data['recipes']
+        found = set(Recipe.objects.filter(
+            id__in=ids).values_list('id', flat=True))
+        linked = set(self.model.objects.filter(
+            user=user, recipe_id__in=found).values_list('recipe_id',
+                                                        flat=True))
+        return ids, found, linked
+
+    @atomic
+    def add(self):
+        user = self.context['request'].user
+        ids, found, linked = self.get_statuses()
+        added = [recipe_id for recipe_id in ids
+                 if recipe_id in found and recipe_id not in linked]
+        created = [self.model(user=user, recipe_id=recipe_id)
+                   for recipe_id in added]
+        self.model.objects.bulk_create(created, ignore_conflicts=True)
+        if added:
+            apply_counters(self.model, created)
+            bump_version(f'user:{user.pk}')
+        return self.results(ids, found, linked, 'added', 'exists')
+
+    @atomic
+    def remove(self):
+        user = self.context['request'].user
+        ids, found, linked = self.get_statuses()
+        if linked:
+            self.delete_linked(user, linked)
+            bump_version(f'user:{user.pk}')
+        return self.results(ids, found, linked, 'absent', 'removed')
+
+    def delete_linked(self, user, linked):
+        queryset = self.model.objects.filter(user=user, recipe_id__in=linked)
+        removed = list(queryset)
+        queryset._raw_delete(queryset.db)
+        apply_counters(self.model, removed, -1)
+        return removed
+
+    @staticmethod
+    def results(ids, found, linked, new_status, linked_status):
+        results = []
+        for recipe_id in ids:
+            if recipe_id not in found:
+                item_status = 'not_found'
+            elif recipe_id in linked:
+                item_status = linked_status
+            else:
+                item_status = new_status
+            results.append({'id': recipe_id, 'status': item_status})
+        return results
+
+
+class ShoppingCartBatchSerializer(FavoriteBatchSerializer):
+    model = ShoppingCart
+
+    @atomic
+    def add(self):
+        results = super().add()
+        apply_cart_changes(self.context['request'].user.pk, {
+            item['id']: 1 for item in results if item['status'] == 'added'})
+        return results
+
+    def delete_linked(self, user, linked):
+        removed = super().delete_linked(user, linked)
+        apply_cart_changes(user.pk, {
+            item.recipe_id: -item.servings for item in removed})
+        return removed
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -159,7 +312,7 @@ class RecipeIngredientSerializer(serializers. ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(RecipeImageSerializer, serializers.ModelSerializer):
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     tags = TagSerializer(many=True)
@@ -180,23 +333,49 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_srcset',
+            'image_preview',
             'text',
             'cooking_time',
         )
 
+    def to_representation(self, instance):
+        if hasattr(instance, 'author_is_subscribed'):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
+
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = self.context['request'].user
         if user.is_authenticated:
             return Favorite.objects.filter(user=user, recipe=obj).exists()
         return False
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context['request'].user
         if user.is_authenticated:
             return ShoppingCart.objects.filter(user=user, recipe=obj).exists()
         return False
 
 
+class RecipeDetailSerializer(RecipeSerializer):
+    related = serializers.SerializerMethodField()
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('related',)
+
+    def get_related(self, obj):
+        ids = related_recipe_index.related(obj.pk,
+                                           settings.RELATED_RECIPES_COUNT)
+        recipes = Recipe.objects.minified().in_bulk(ids)
+        return RecipeMinifiedSerializer(
+            [recipes[pk] for pk in ids if pk in recipes], many=True,
+            context=self.context).data
+
+
 class RecipeIngredientCreateSerializer(serializers.ModelSerializer):
     id = serializers.PrimaryKeyRelatedField(
         queryset=Ingredient.objects.all(),
@@ -209,12 +388,26 @@ class RecipeIngredientCreateSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
+class TagPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            tag = tag_registry.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if tag is None:
+            self.fail('does_not_exist', pk_value=data)
+        return tag
+
+
 class RecipeCreateSerializer(serializers.ModelSerializer):
     ingredients = RecipeIngredientCreateSerializer(many=True)
     image = Base64ImageField()
-    tags = serializers.PrimaryKeyRelatedField(many=True,
-                                              queryset=Tag.objects.all(),
-                                              required=True)
+    tags = TagPrimaryKeyRelatedField(many=True,
+                                     queryset=Tag.objects.all(),
+                                     required=True)
     cooking_time = serializers.IntegerField(validators=[validate_cooking_time])
 
     class Meta:
@@ -230,35 +423,45 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
 
     def validate(self, obj):
         for field in ['name', 'text', 'cooking_time', 'image']:
+            if self.partial and field not in obj:
+                continue
             if not obj.get(field):
                 raise serializers.ValidationError(
                     f'{field} - Обязательное поле.'
                 )
-        tags = obj.get('tags', [])
-        if not tags:
-            raise serializers.ValidationError(
-                'Поле тэгов не может быть пустым.')
-        tag_ids = [tag.id for tag in tags]
-        unique_tag_ids = set(tag_ids)
-        if len(tag_ids) != len(unique_tag_ids):
-            raise serializers.ValidationError(
-                'Тэги должны быть уникальными.')
-
-        ingredients = obj.get('ingredients', [])
-        if not ingredients:
-            raise serializers.ValidationError(
-                'Поле ингредиентов не может быть пустым')
-
-        ingredient_ids = [item['ingredient'].id for item in ingredients]
-        unique_ingredient_ids = set(ingredient_ids)
-        if len(ingredient_ids) != len(unique_ingredient_ids):
-            raise serializers.ValidationError(
-                'Ингредиенты должны быть уникальными.'
-            )
+        if not self.partial or 'tags' in obj:
+            tags = obj.get('tags', [])
+            if not tags:
+                raise serializers.ValidationError(
+                    'Поле тэгов не может быть пустым.')
+            tag_ids = [tag.id for tag in tags]
+            if len(tag_ids) != len(set(tag_ids)):
+                raise serializers.ValidationError(
+                    'Тэги должны быть уникальными.')
+        if not self.partial or 'ingredients' in obj:
+            ingredients = obj.get('ingredients', [])
+            if not ingredients:
+                raise serializers.ValidationError(
+                    'Поле ингредиентов не может быть пустым')
+            ingredient_ids = [item['ingredient'].id for item in ingredients]
+            if len(ingredient_ids) != len(set(ingredient_ids)):
+                raise serializers.ValidationError(
+                    'Ингредиенты должны быть уникальными.'
+                )
         return obj
 
-    @atomic(durable=True)
     def create(self, validated_data):
+        validated_data['image'] = store_image(validated_data['image'])
+        try:
+            recipe = self.create_recipe(validated_data)
+        except Exception:
+            delete_image(validated_data['image'], {})
+            raise
+        schedule_variants(recipe)
+        return recipe
+
+    @atomic(durable=True)
+    def create_recipe(self, validated_data):
         tags = validated_data.pop('tags', [])
         ingredients = validated_data.pop('ingredients')
         recipe = Recipe.objects.create(author=self.context['request'].user,
@@ -272,36 +475,92 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             ) for ingredient_data in ingredients
         ]
         RecipeIngredient.objects.bulk_create(recipe_ingredients)
-        recipe.save()
+        update_search_vectors(Recipe.objects.filter(pk=recipe.pk))
+        bump_version('recipes', f'recipe:{recipe.pk}')
         return recipe
 
-    @atomic(durable=True)
     def update(self, instance, validated_data):
-        instance.name = validated_data.get('name', instance.name)
-        instance.text = validated_data.get('text', instance.text)
-        instance.cooking_time = validated_data.get('cooking_time',
-                                                   instance.cooking_time)
-        instance.image.delete()
-        instance.image = validated_data.get('image', instance.image)
-
-        new_tags = validated_data.pop('tags', [])
-        instance.tags.set(new_tags)
-
-        new_ingredients_data = validated_data.pop('ingredients', [])
-        existing_recipe_ingredients = instance.ingredientes.all()
-        existing_recipe_ingredients.delete()
+        if 'image' not in validated_data:
+            return self.update_recipe(instance, validated_data)
+        old_image = instance.image.name
+        old_variants = instance.image_variants
+        validated_data['image'] = store_image(validated_data['image'])
+        try:
+            instance = self.update_recipe(instance, validated_data)
+        except Exception:
+            delete_image(validated_data['image'], {})
+            raise
+        delete_image(old_image, old_variants)
+        schedule_variants(instance)
+        return instance
 
-        recipe_ingredients = [
-            RecipeIngredient(
-                recipe=instance,
-                ingredient=ingredient_data['ingredient'],
-                amount=ingredient_data['amount']
-            ) for ingredient_data in new_ingredients_data
+    @atomic(durable=True)
+    def update_recipe(self, instance, validated_data):
+        update_fields = [
+            field for field in ('name', 'text', 'cooking_time', 'image')
+            if field in validated_data
+            and getattr(instance, field) != validated_data[field]
         ]
-        RecipeIngredient.objects.bulk_create(recipe_ingredients)
-
-        instance.save()
+        for field in update_fields:
+            setattr(instance, field, validated_data[field])
+        if 'image' in update_fields:
+            instance.image_variants = {}
+            update_fields.append('image_variants')
+        tags_changed = 'tags' in validated_data and self.update_tags(
+            instance, validated_data['tags'])
+        ingredients_changed = 'ingredients' in validated_data and (
+            self.update_ingredients(instance, validated_data['ingredients']))
+        if update_fields or tags_changed or ingredients_changed:
+            instance.save(update_fields=update_fields + ['updated_at'])
+        if ingredients_changed or {'name', 'text'} & set(update_fields):
+            update_search_vectors(Recipe.objects.filter(pk=instance.pk))
         return instance
 
+    def update_tags(self, instance, tags):
+        current = {tag.id for tag in instance.tags.all()}
+        new = {tag.id for tag in tags}
+        if current - new:
+            instance.tags.remove(*(current - new))
+        if new - current:
+            instance.tags.add(*(new - current))
+        return current != new
+
+    def update_ingredients(self, instance, ingredients):
+        current = {item.ingredient_id: item
+                   for item in instance.ingredientes.all()}
+        previous = {ingredient_id: item.amount
+                    for ingredient_id, item in current.items()}
+        new = {item['ingredient'].id: item['amount'] for item in ingredients}
+        removed = [item.id for ingredient_id, item in current.items()
+                   if ingredient_id not in new]
+        changed = []
+        for ingredient_id, amount in new.items():
+            item = current.get(ingredient_id)
+            if item is not None and item.amount != amount:
+                item.amount = amount
+                changed.append(item)
+        added = [
+            RecipeIngredient(recipe=instance, ingredient_id=ingredient_id,
+                             amount=amount)
+            for ingredient_id, amount in new.items()
+            if ingredient_id not in current
+        ]
+        if removed:
+            RecipeIngredient.objects.filter(id__in=removed).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        if added:
+            RecipeIngredient.objects.bulk_create(added)
+        if changed or added:
+            apply_recipe_changes(instance.pk, {
+                ingredient_id: amount - previous.get(ingredient_id, 0)
+                for ingredient_id, amount in new.items()})
+        if not (removed or changed or added):
+            return False
+        getattr(instance, '_prefetched_objects_cache', {}).pop(
+            'ingredientes', None)
+        return True
+
     def to_representation(self, instance):
+        prefetch_related_objects([instance], *recipe_prefetches())
         return RecipeSerializer(instance, context=self.context).data
@@ -2,7 +2,7 @@ from django.urls import include, path
 from rest_framework import routers
 
 from .views import (
-    IngredientViewSet, RecipeViewSet,
+    IngredientViewSet, MetricsView, RecipeViewSet,
     SubscriptionViewSet, TagViewSet)
 
 app_name = 'api'
@@ -15,6 +15,7 @@ router.register('recipes', RecipeViewSet, basename='recipes')
 router.register('ingredients', IngredientViewSet, basename='ingredients')
 
 urlpatterns = [
+    path('_metrics/', MetricsView.as_view(), name='metrics'),
     path('', include(router.urls)),
     path('', include('djoser.urls.base')),
     path('auth/', include('djoser.urls.authtoken')),
@@ -1,6 +1,14 @@
+import csv
+import hashlib
+import json
+import os
 from collections import namedtuple
 from io import BytesIO
 
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
@@ -8,8 +16,19 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
 
+from recipes.models import ShoppingListLine
 
-def generate_shopping_list_pdf(shopping_list, user):
+
+def register_fonts():
+    pdfmetrics.registerFont(TTFont(
+        'Wolgadeutsche',
+        os.path.join(settings.CSV_FILES_DIR, 'Wolgadeutsche.ttf')))
+    pdfmetrics.registerFont(TTFont(
+        'Timesnewromanpsmt',
+        os.path.join(settings.CSV_FILES_DIR, 'timesnewromanpsmt.ttf')))
+
+
+def generate_shopping_list_pdf(shopping_list):
 
     def header_footer(canvas, doc):
         canvas.saveState()
@@ -23,11 +42,6 @@ def generate_shopping_list_pdf(shopping_list, user):
 
         canvas.restoreState()
 
-    pdfmetrics.registerFont(
-        TTFont('Wolgadeutsche', 'data/Wolgadeutsche.ttf'))
-    pdfmetrics.registerFont(
-        TTFont('Timesnewromanpsmt', 'data/timesnewromanpsmt.ttf'))
-
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter, title='Shopping List')
 
@@ -55,20 +69,64 @@ def generate_shopping_list_pdf(shopping_list, user):
     return buffer
 
 
+def get_shopping_list_pdf(shopping_list):
+    digest = hashlib.sha256(json.dumps(
+        shopping_list, ensure_ascii=False, default=str).encode()).hexdigest()
+    key = f'shopping-list-pdf:{digest}'
+    pdf = cache.get(key)
+    if pdf is None:
+        pdf = generate_shopping_list_pdf(shopping_list).getvalue()
+        cache.set(key, pdf, settings.SHOPPING_LIST_PDF_CACHE_TIMEOUT)
+    return pdf
+
+
+class Echo:
+
+    def write(self, value):
+        return value
+
+
+def iter_shopping_list_csv(shopping_list):
+    writer = csv.writer(Echo())
+    yield '\ufeff' + writer.writerow(
+        ('Ингредиент', 'Количество', 'Единица измерения'))
+    for item in shopping_list:
+        yield writer.writerow(item)
+
+
+def iter_shopping_list_txt(shopping_list):
+    yield 'Список продуктов\n\n'
+    for item in shopping_list:
+        yield f'{item.name} - {item.amount} {item.measurement_unit}\n'
+
+
+SHOPPING_LIST_EXPORTS = {
+    'csv': (iter_shopping_list_csv, 'text/csv; charset=utf-8'),
+    'txt': (iter_shopping_list_txt, 'text/plain; charset=utf-8'),
+}
+
+
 ShoppingListItem = namedtuple('ShoppingListItem',
                               ['name', 'amount', 'measurement_unit'])
 
 
-def process_shopping_list(recipe_list):
-    ingredients = {}
-    for recipe in recipe_list:
-        for ingredient in (recipe.ingredientes.select_related
-                           ('ingredient').all()):
-            piece = (ingredient.ingredient.name,
-                     ingredient.ingredient.measurement_unit)
-            if piece not in ingredients:
-                ingredients[piece] = 0
-            ingredients[piece] += ingredient.amount
-
-    return [ShoppingListItem(name, amount, measurement_unit)
-            for ((name, measurement_unit), amount) in ingredients.items()]
+def shopping_list_lines(user):
+    return (
+        ShoppingListLine.objects
+        .filter(user=user)
+        .annotate(
+            name=F('ingredient__name'),
+            unit=Coalesce('ingredient__unit_conversion__base_unit',
+                          'ingredient__measurement_unit'),
+        )
+        .values('name', 'unit')
+        .annotate(total=Sum(
+            F('total_amount')
+            * Coalesce('ingredient__unit_conversion__factor', 1)))
+        .order_by('name', 'unit')
+    )
+
+
+def process_shopping_list(user):
+    return [ShoppingListItem(item['name'], item['total'], item['unit'])
+            for item in shopping_list_lines(user)]
@@ -1,35 +1,55 @@
-from django.http import FileResponse
+import os
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.db.models import Value
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
+from recipes.caches import ingredient_index, tag_registry
 from recipes.models import Favorite, Recipe, ShoppingCart, Tag, Ingredient
 from rest_framework import status, viewsets, mixins
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from users.models import FoodgramUser, Subscription
 
 from .serializers import (
-    FavoriteCreateSerializer, IngredientSerializer, RecipeCreateSerializer,
-    RecipeMinifiedSerializer, RecipeSerializer, ShoppingCartCreateSerializer,
-    SubscriptionCreateSerializer, SubscriptionSerializer, TagSerializer)
+    FavoriteBatchSerializer, FavoriteCreateSerializer, IngredientSerializer,
+    RecipeCreateSerializer, RecipeDetailSerializer, RecipeMinifiedSerializer,
+    RecipeSerializer,
+    ShoppingCartBatchSerializer, ShoppingCartCreateSerializer,
+    ShoppingCartServingsSerializer,
+    SubscriptionCreateSerializer, SubscriptionSerializer, TagSerializer,
+    get_recipes_limit)
 from .permissions import IsAuthorOrReadOnly
+from .caching import recipe_feed_cache
 from .filters import IngredientFilter, RecipeFilter
-from .utils import generate_shopping_list_pdf, process_shopping_list
-from api.paginations import CustomPagination
+from .metrics import registry
+from .mixins import ConditionalGetMixin
+from .renderers import CSVRenderer, PDFRenderer, TXTRenderer
+from .utils import (
+    SHOPPING_LIST_EXPORTS, get_shopping_list_pdf, process_shopping_list)
+from api.paginations import FeedPagination
 
 
 class SubscriptionViewSet(viewsets.GenericViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = SubscriptionSerializer
-    pagination_class = CustomPagination
+    pagination_class = FeedPagination
     http_method_names = ('get', 'post', 'delete')
 
     @action(detail=False, methods=['get'])
     def subscriptions(self, request):
-        queryset = FoodgramUser.objects.filter(subscribers__user=request.user)
+        queryset = FoodgramUser.objects.filter(
+            followed_by__user=request.user
+        ).annotate(is_subscribed=Value(True))
         paginator = self.pagination_class()
         page = paginator.paginate_queryset(queryset, request)
+        Recipe.objects.prefetch_for_authors(page, get_recipes_limit(request))
         serializer = SubscriptionSerializer(page, many=True,
                                             context={'request': request})
         return paginator.get_paginated_response(serializer.data)
@@ -55,15 +75,32 @@ class SubscriptionViewSet(viewsets.GenericViewSet):
             return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TagViewSet(mixins.ListModelMixin,
+class TagViewSet(ConditionalGetMixin,
+                 mixins.ListModelMixin,
                  mixins.RetrieveModelMixin,
                  viewsets.GenericViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
+    cache_control = {'public': True,
+                     'max_age': settings.REFERENCE_DATA_MAX_AGE}
+
+    def get_version_names(self):
+        return ('tags',)
+
+    def get_object(self):
+        pk = self.kwargs['pk']
+        tag = tag_registry.get(int(pk)) if pk.isdigit() else None
+        if tag is None:
+            raise Http404
+        return tag
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer(tag_registry.all(), many=True)
+        return Response(serializer.data)
 
 
-class IngredientViewSet(ModelViewSet):
+class IngredientViewSet(ConditionalGetMixin, ModelViewSet):
     serializer_class = IngredientSerializer
     queryset = Ingredient.objects.all()
     http_method_names = ['get']
@@ -71,25 +108,72 @@ class IngredientViewSet(ModelViewSet):
     pagination_class = None
     filter_backends = [DjangoFilterBackend]
     filterset_class = IngredientFilter
+    cache_control = {'public': True,
+                     'max_age': settings.REFERENCE_DATA_MAX_AGE}
 
+    def get_version_names(self):
+        return ('ingredients',)
 
-class RecipeViewSet(ModelViewSet):
-    queryset = Recipe.objects.all()
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if not name:
+            return super().list(request, *args, **kwargs)
+        serializer = self.get_serializer(ingredient_index.search(name),
+                                         many=True)
+        return Response(serializer.data)
+
+
+class RecipeViewSet(ConditionalGetMixin, ModelViewSet):
     permission_classes = [IsAuthorOrReadOnly]
-    pagination_class = CustomPagination
+    pagination_class = FeedPagination
     filter_backends = (DjangoFilterBackend, )
     filterset_class = RecipeFilter
     http_method_names = ['get', 'post', 'put', 'patch', 'delete']
+    conditional_actions = ('retrieve',)
+
+    def get_version_names(self):
+        names = ['tags', 'ingredients', 'users', 'recipe_features',
+                 f'recipe:{self.kwargs["pk"]}']
+        if self.request.user.is_authenticated:
+            names.append(f'user:{self.request.user.pk}')
+        return names
+
+    def get_queryset(self):
+        return Recipe.objects.for_feed(self.request.user)
+
+    def perform_content_negotiation(self, request, force=False):
+        if self.action == 'download_shopping_cart':
+            force = True
+        return super().perform_content_negotiation(request, force)
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+        key = recipe_feed_cache.make_key(request)
+        data = recipe_feed_cache.get(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            recipe_feed_cache.set(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
 
     def get_serializer_class(self):
         if self.action in ('create', 'update', 'partial_update'):
             return RecipeCreateSerializer
+        if self.action == 'retrieve':
+            return RecipeDetailSerializer
         return RecipeSerializer
 
     @staticmethod
     def common_action(serializer_class, model, pk, request):
-        serializer = serializer_class(data={'recipe': pk,
-                                            'user': request.user},
+        data = request.data
+        if isinstance(data, Mapping):
+            data = {**data, 'recipe': pk}
+        serializer = serializer_class(data=data,
                                       context={'request': request})
         serializer.is_valid(raise_exception=True)
 
@@ -113,32 +197,110 @@ class RecipeViewSet(ModelViewSet):
         return self.common_action(FavoriteCreateSerializer, Favorite,
                                   pk, request)
 
-    @action(detail=True, methods=['post', 'delete'], url_path='shopping_cart',
-            url_name='shopping_cart_actions',
+    @action(detail=True, methods=['post', 'patch', 'delete'],
+            url_path='shopping_cart', url_name='shopping_cart_actions',
             permission_classes=[IsAuthenticated])
     def shopping_cart_actions(self, request, pk=None):
+        if request.method == 'PATCH':
+            cart = get_object_or_404(ShoppingCart, user=request.user,
+                                     recipe_id=pk)
+            serializer = ShoppingCartServingsSerializer(cart,
+                                                        data=request.data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            return Response(serializer.data)
         return self.common_action(ShoppingCartCreateSerializer, ShoppingCart,
                                   pk, request)
 
+    @staticmethod
+    def batch_action(serializer_class, request):
+        serializer = serializer_class(data=request.data,
+                                      context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        if request.method == 'POST':
+            results = serializer.add()
+        else:
+            results = serializer.remove()
+        return Response({'results': results})
+
+    @action(detail=False, methods=['post', 'delete'], url_path='favorite',
+            url_name='favorite_batch',
+            permission_classes=[IsAuthenticated])
+    def favorite_batch(self, request):
+        return self.batch_action(FavoriteBatchSerializer, request)
+
+    @action(detail=False, methods=['post', 'delete'], url_path='shopping_cart',
+            url_name='shopping_cart_batch',
+            permission_classes=[IsAuthenticated])
+    def shopping_cart_batch(self, request):
+        return self.batch_action(ShoppingCartBatchSerializer, request)
+
+    @staticmethod
+    def get_limit(request, maximum):
+        limit = request.query_params.get('limit', '')
+        if limit.isdigit():
+            return min(int(limit), maximum)
+        return maximum
+
+    def minified_response(self, recipes):
+        serializer = RecipeMinifiedSerializer(
+            recipes, many=True, context={'request': self.request})
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        recipe = get_object_or_404(Recipe, pk=pk)
+        limit = self.get_limit(request, settings.SIMILAR_RECIPES_COUNT)
+        return self.minified_response(
+            Recipe.objects.minified().similar_to(recipe)[:limit])
+
+    @action(detail=False, methods=['get'],
+            permission_classes=[IsAuthenticated])
+    def recommended(self, request):
+        limit = self.get_limit(request, settings.RECOMMENDED_RECIPES_COUNT)
+        recipes = Recipe.objects.minified()
+        recommended = list(recipes.recommended_for(request.user)[:limit])
+        if not recommended:
+            recommended = recipes.unseen_by(request.user).order_by(
+                '-trending_score', '-favorites_count', '-pub_date')[:limit]
+        return self.minified_response(recommended)
+
     @action(detail=False, methods=['get'], url_path='download_shopping_cart',
             url_name='download_shopping_cart',
-            permission_classes=[IsAuthenticated],)
-    def download_shopping_cart(self, request, file_ext='pdf'):
+            permission_classes=[IsAuthenticated],
+            renderer_classes=[JSONRenderer, PDFRenderer,
+                              CSVRenderer, TXTRenderer])
+    def download_shopping_cart(self, request):
         user = request.user
-        current_user_shopping_list = Recipe.objects.filter(
-            shoppingcart__user=user)
-        shopping_list_items = process_shopping_list(current_user_shopping_list)
+        file_ext = request.query_params.get('format', 'pdf')
+        shopping_list_items = process_shopping_list(user)
 
         if file_ext == 'pdf':
-            content_type = 'application/pdf'
-            buffer = generate_shopping_list_pdf(shopping_list_items, user)
+            response = HttpResponse(
+                get_shopping_list_pdf(shopping_list_items),
+                content_type=PDFRenderer.media_type)
+        elif file_ext in SHOPPING_LIST_EXPORTS:
+            export, content_type = SHOPPING_LIST_EXPORTS[file_ext]
+            response = StreamingHttpResponse(
+                export(shopping_list_items), content_type=content_type)
         else:
             return Response(
                 {'detail': 'Недопустимый формат файла.'},
                 status=status.HTTP_400_BAD_REQUEST)
 
-        response = FileResponse(buffer, content_type=content_type)
         filename = f'{user.username}_shopping_cart.{file_ext}'
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
 
         return response
+
+
+class MetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            'enabled': settings.API_METRICS_ENABLED,
+            'pid': os.getpid(),
+            'views': registry.snapshot(),
+            'recipe_feed_cache': recipe_feed_cache.stats(),
+        })
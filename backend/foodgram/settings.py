@@ -30,6 +30,8 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.VersionSnapshotMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,11 +69,31 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 0)),
     }
 }
 
 
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+RESPONSE_CACHE_ALIAS = os.getenv('RESPONSE_CACHE_ALIAS', 'default')
+
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 5 * 60))
+
+
 AUTH_USER_MODEL = 'users.FoodgramUser'
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -108,6 +130,31 @@ MEDIA_ROOT = '/media'
 
 CSV_FILES_DIR = os.path.join(BASE_DIR, 'data')
 
+IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
+
+IMAGE_PREVIEW_WIDTH = 640
+
+IMAGE_QUALITY = 80
+
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+
+RECIPE_BATCH_MAX_SIZE = int(os.getenv('RECIPE_BATCH_MAX_SIZE', 100))
+
+REFERENCE_DATA_MAX_AGE = int(os.getenv('REFERENCE_DATA_MAX_AGE', 60))
+
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', 72))
+
+TRENDING_WINDOW_DAYS = int(os.getenv('TRENDING_WINDOW_DAYS', 14))
+
+SIMILAR_RECIPES_COUNT = int(os.getenv('SIMILAR_RECIPES_COUNT', 20))
+
+RECOMMENDED_RECIPES_COUNT = int(os.getenv('RECOMMENDED_RECIPES_COUNT', 20))
+
+RELATED_RECIPES_COUNT = int(os.getenv('RELATED_RECIPES_COUNT', 6))
+
+SHOPPING_LIST_PDF_CACHE_TIMEOUT = int(
+    os.getenv('SHOPPING_LIST_PDF_CACHE_TIMEOUT', 60 * 60))
+
 
 REST_FRAMEWORK = {
 
@@ -155,8 +202,18 @@ LOGGING = {
     'loggers': {
         'django': {
             'handlers': ['file'],
-            'level': 'DEBUG',
+            'level': os.getenv('DJANGO_LOG_LEVEL', 'INFO'),
             'propagate': True,
         },
+        'api.metrics': {
+            'handlers': ['file'],
+            'level': 'INFO',
+        },
     },
 }
+
+API_METRICS_ENABLED = strtobool(os.getenv('API_METRICS_ENABLED', 'False'))
+
+API_METRICS_SLOW_QUERY_MS = float(os.getenv('API_METRICS_SLOW_QUERY_MS', 100))
+
+API_METRICS_SAMPLES = int(os.getenv('API_METRICS_SAMPLES', 1000))
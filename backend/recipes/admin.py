@@ -1,8 +1,10 @@
 from django.contrib import admin
 
 from .models import (
-    Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag)
+    Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag,
+    UnitConversion)
 from .constants import SCORE_MIN, AMOUNT_SCORE_MAX
+from .search import update_search_vectors
 
 
 class RecipeIngredientInline(admin.TabularInline):
@@ -37,7 +39,8 @@ class RecipeAdmin(admin.ModelAdmin):
         'author',
         'text',
         'image',
-        'get_count_in_favourite'
+        'get_count_in_favourite',
+        'in_carts_count'
     )
     list_display_links = ('name',)
     search_fields = (
@@ -49,12 +52,21 @@ class RecipeAdmin(admin.ModelAdmin):
     list_editable = (
         'author',
     )
+    readonly_fields = (
+        'favorites_count',
+        'in_carts_count',
+        'trending_score'
+    )
     list_filter = ('tags',)
     empty_value_display = '-пусто-'
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        update_search_vectors(Recipe.objects.filter(pk=form.instance.pk))
+
     @admin.display(description='Количество в избранных')
     def get_count_in_favourite(self, object):
-        return object.user_favorites.count()
+        return object.favorites_count
 
 
 @admin.register(Ingredient)
@@ -89,8 +101,20 @@ class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = (
         'pk',
         'user',
-        'recipe'
+        'recipe',
+        'servings'
     )
     list_editable = ('user', 'recipe')
     search_fields = ('user', 'recipe')
     empty_value_display = '-пусто-'
+
+
+@admin.register(UnitConversion)
+class UnitConversionAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'unit',
+        'base_unit',
+        'factor'
+    )
+    search_fields = ('unit', 'base_unit')
@@ -0,0 +1,294 @@
+import bisect
+import threading
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from .models import Ingredient, Recipe, RecipeIngredient, Tag
+from .versions import get_version
+
+POPCOUNT = np.array([bin(value).count('1') for value in range(256)],
+                    dtype=np.uint8)
+
+
+class VersionedCache:
+    namespace = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+
+    def build(self):
+        raise NotImplementedError
+
+    def refresh(self):
+        self.build()
+
+    def ensure(self):
+        version = get_version(self.namespace)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    if self._version is None:
+                        self.build()
+                    else:
+                        self.refresh()
+                    self._version = version
+
+
+class TagRegistry(VersionedCache):
+    namespace = 'tags'
+
+    def build(self):
+        tags = list(Tag.objects.order_by('id'))
+        self._entries = (tags,
+                         {tag.id: tag for tag in tags},
+                         {tag.slug: tag for tag in tags})
+
+    def all(self):
+        self.ensure()
+        return self._entries[0]
+
+    def get(self, pk):
+        self.ensure()
+        return self._entries[1].get(pk)
+
+    def get_by_slug(self, slug):
+        self.ensure()
+        return self._entries[2].get(slug)
+
+
+class IngredientIndex(VersionedCache):
+    namespace = 'ingredients'
+
+    def build(self):
+        ingredients = sorted(Ingredient.objects.all(),
+                             key=lambda item: (item.name.lower(), item.id))
+        self._entries = ([item.name.lower() for item in ingredients],
+                         ingredients)
+
+    def search(self, query):
+        self.ensure()
+        names, ingredients = self._entries
+        query = query.lower()
+        start = bisect.bisect_left(names, query)
+        end = start
+        while end < len(names) and names[end].startswith(query):
+            end += 1
+        contains = [ingredient
+                    for name, ingredient in zip(names, ingredients)
+                    if query in name and not name.startswith(query)]
+        return ingredients[start:end] + contains
+
+
+class RecipeIngredientIndex(VersionedCache):
+    namespace = 'recipe_ingredients'
+    refresh_overlap = timedelta(minutes=1)
+
+    def build(self):
+        synced_at = timezone.now()
+        published = {pk: pub_date.timestamp() for pk, pub_date in
+                     Recipe.objects.order_by().values_list(
+                         'pk', 'pub_date').iterator()}
+        recipes = {pk: [] for pk in published}
+        rows = RecipeIngredient.objects.order_by().values_list(
+            'recipe_id', 'ingredient_id')
+        for recipe_id, ingredient_id in rows.iterator():
+            recipes.setdefault(recipe_id, []).append(ingredient_id)
+        postings = defaultdict(list)
+        for recipe_id, ingredients in recipes.items():
+            for ingredient_id in ingredients:
+                postings[ingredient_id].append(recipe_id)
+        self._recipes = {recipe_id: frozenset(ingredients)
+                         for recipe_id, ingredients in recipes.items()}
+        self._postings = {ingredient_id: tuple(recipe_ids)
+                          for ingredient_id, recipe_ids in postings.items()}
+        self._published = published
+        self._synced_at = synced_at
+
+    def refresh(self):
+        synced_at = timezone.now()
+        changed = dict(Recipe.objects.filter(
+            updated_at__gte=self._synced_at - self.refresh_overlap
+        ).values_list('pk', 'pub_date'))
+        self._published.update(
+            (pk, pub_date.timestamp()) for pk, pub_date in changed.items())
+        current = defaultdict(set)
+        rows = RecipeIngredient.objects.filter(
+            recipe_id__in=changed).values_list('recipe_id', 'ingredient_id')
+        for recipe_id, ingredient_id in rows:
+            current[recipe_id].add(ingredient_id)
+        for recipe_id in changed:
+            self.replace(recipe_id, frozenset(current[recipe_id]))
+        if Recipe.objects.count() != len(self._recipes):
+            existing = set(Recipe.objects.order_by().values_list(
+                'pk', flat=True).iterator())
+            for recipe_id in self._recipes.keys() - existing:
+                self.replace(recipe_id, frozenset())
+                del self._recipes[recipe_id]
+                self._published.pop(recipe_id, None)
+        self._synced_at = synced_at
+
+    def replace(self, recipe_id, ingredients):
+        previous = self._recipes.get(recipe_id, frozenset())
+        if previous == ingredients:
+            return
+        for ingredient_id in previous - ingredients:
+            self._postings[ingredient_id] = tuple(
+                pk for pk in self._postings[ingredient_id]
+                if pk != recipe_id)
+        for ingredient_id in ingredients - previous:
+            self._postings[ingredient_id] = (
+                self._postings.get(ingredient_id, ()) + (recipe_id,))
+        self._recipes[recipe_id] = ingredients
+
+    def cookable(self, ingredients, missing_max=0):
+        self.ensure()
+        matched = Counter()
+        for ingredient_id in set(ingredients):
+            matched.update(self._postings.get(ingredient_id, ()))
+        missing = {}
+        for recipe_id, count in matched.items():
+            recipe_missing = len(self._recipes.get(recipe_id, ())) - count
+            if 0 <= recipe_missing <= missing_max:
+                missing[recipe_id] = recipe_missing
+        return missing
+
+    def ranked(self, ingredients, missing_max=0):
+        missing = self.cookable(ingredients, missing_max)
+        recipe_ids = sorted(
+            missing, key=lambda pk: (self._published.get(pk, 0), pk),
+            reverse=True)
+        recipe_ids.sort(key=missing.get)
+        return recipe_ids
+
+
+class RelatedRecipeIndex(VersionedCache):
+    namespace = 'recipe_features'
+    refresh_overlap = timedelta(minutes=1)
+
+    @staticmethod
+    def load_features(recipe_ids=None):
+        tags = Recipe.tags.through.objects.order_by().values_list(
+            'recipe_id', 'tag_id')
+        ingredients = RecipeIngredient.objects.order_by().values_list(
+            'recipe_id', 'ingredient_id')
+        if recipe_ids is not None:
+            tags = tags.filter(recipe_id__in=recipe_ids)
+            ingredients = ingredients.filter(recipe_id__in=recipe_ids)
+        features = defaultdict(set)
+        for recipe_id, tag_id in tags.iterator():
+            features[recipe_id].add(('tag', tag_id))
+        for recipe_id, ingredient_id in ingredients.iterator():
+            features[recipe_id].add(('ingredient', ingredient_id))
+        return features
+
+    def build(self):
+        synced_at = timezone.now()
+        recipe_ids = list(Recipe.objects.order_by().values_list(
+            'pk', flat=True).iterator())
+        features = self.load_features()
+        self._features = {}
+        self._rows = {pk: row for row, pk in enumerate(recipe_ids)}
+        rows, bits = [], []
+        for recipe_id, recipe_features in features.items():
+            row = self._rows.get(recipe_id)
+            if row is None:
+                continue
+            for feature in recipe_features:
+                rows.append(row)
+                bits.append(self._features.setdefault(
+                    feature, len(self._features)))
+        rows = np.array(rows, dtype=np.int64)
+        bits = np.array(bits, dtype=np.int64)
+        self._count = len(recipe_ids)
+        self._recipe_ids = np.array(recipe_ids, dtype=np.int64)
+        self._bits = np.zeros((self._count, (len(self._features) + 7) // 8),
+                              dtype=np.uint8)
+        np.bitwise_or.at(self._bits, (rows, bits >> 3),
+                         (1 << (bits & 7)).astype(np.uint8))
+        self._sizes = np.bincount(rows, minlength=self._count).astype(
+            np.int32)
+        self._synced_at = synced_at
+
+    def refresh(self):
+        synced_at = timezone.now()
+        changed = list(Recipe.objects.filter(
+            updated_at__gte=self._synced_at - self.refresh_overlap
+        ).values_list('pk', flat=True))
+        features = self.load_features(changed)
+        for recipe_id in changed:
+            self.replace(recipe_id, features.get(recipe_id, set()))
+        if Recipe.objects.count() != len(self._rows):
+            existing = set(Recipe.objects.order_by().values_list(
+                'pk', flat=True).iterator())
+            for recipe_id in self._rows.keys() - existing:
+                self.replace(recipe_id, set())
+                self._recipe_ids[self._rows.pop(recipe_id)] = 0
+        self._synced_at = synced_at
+
+    def feature_bit(self, feature):
+        bit = self._features.get(feature)
+        if bit is None:
+            bit = self._features[feature] = len(self._features)
+            if bit >= self._bits.shape[1] * 8:
+                self._bits = np.pad(
+                    self._bits, ((0, 0), (0, max(self._bits.shape[1], 8))))
+        return bit
+
+    def recipe_row(self, recipe_id):
+        row = self._rows.get(recipe_id)
+        if row is not None:
+            return row
+        if self._count == len(self._recipe_ids):
+            grow = max(self._count, 16)
+            self._bits = np.pad(self._bits, ((0, grow), (0, 0)))
+            self._recipe_ids = np.pad(self._recipe_ids, (0, grow))
+            self._sizes = np.pad(self._sizes, (0, grow))
+        row = self._rows[recipe_id] = self._count
+        self._recipe_ids[row] = recipe_id
+        self._count += 1
+        return row
+
+    def replace(self, recipe_id, features):
+        bits = np.array([self.feature_bit(feature) for feature in features],
+                        dtype=np.int64)
+        row = self.recipe_row(recipe_id)
+        self._bits[row] = 0
+        np.bitwise_or.at(self._bits[row], bits >> 3,
+                         (1 << (bits & 7)).astype(np.uint8))
+        self._sizes[row] = len(bits)
+
+    def related(self, recipe_id, count):
+        self.ensure()
+        with self._lock:
+            return self.score(recipe_id, count)
+
+    def score(self, recipe_id, count):
+        used = self._count
+        row = self._rows.get(recipe_id)
+        if row is None or not self._sizes[row] or count <= 0:
+            return []
+        query = self._bits[row]
+        columns = np.flatnonzero(query)
+        common = POPCOUNT[self._bits[:used, columns]
+                          & query[columns]].sum(axis=1, dtype=np.int32)
+        union = self._sizes[:used] + self._sizes[row] - common
+        scores = common / np.maximum(union, 1)
+        scores[row] = 0
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > count:
+            threshold = -np.partition(-scores[candidates], count - 1)[
+                count - 1]
+            candidates = candidates[scores[candidates] >= threshold]
+        candidates = candidates[np.lexsort(
+            (-self._recipe_ids[candidates], -scores[candidates]))]
+        return [int(pk) for pk in self._recipe_ids[candidates[:count]]]
+
+
+tag_registry = TagRegistry()
+ingredient_index = IngredientIndex()
+recipe_ingredient_index = RecipeIngredientIndex()
+related_recipe_index = RelatedRecipeIndex()
@@ -7,3 +7,4 @@ COLOR_LENGTH = 7
 SCORE_MAX = 1440
 SCORE_MIN = 1
 AMOUNT_SCORE_MAX = 100000
+SERVINGS_MAX = 50
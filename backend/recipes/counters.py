@@ -0,0 +1,50 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import FoodgramUser, Subscription
+from .models import Favorite, Recipe, ShoppingCart
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'in_carts_count', ShoppingCart, 'recipe'),
+    (FoodgramUser, 'recipes_count', Recipe, 'author'),
+    (FoodgramUser, 'followers_count', Subscription, 'author'),
+)
+
+
+def change_counter(model, field, pks, delta):
+    queryset = model.objects.filter(pk__in=pks)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def apply_counters(sender, instances, delta=1):
+    for model, field, related_model, related_field in COUNTERS:
+        if related_model is not sender:
+            continue
+        per_object = Counter(getattr(instance, f'{related_field}_id')
+                             for instance in instances)
+        pks_by_delta = defaultdict(list)
+        for pk, count in per_object.items():
+            pks_by_delta[count * delta].append(pk)
+        for object_delta, pks in pks_by_delta.items():
+            change_counter(model, field, pks, object_delta)
+
+
+def actual_count(related_model, related_field):
+    return Coalesce(Subquery(
+        related_model.objects.filter(**{related_field: OuterRef('pk')})
+        .order_by().values(related_field)
+        .annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
+def recount():
+    for model, field, related_model, related_field in COUNTERS:
+        actual = actual_count(related_model, related_field)
+        fixed = model.objects.exclude(**{field: actual}).update(
+            **{field: actual})
+        yield model, field, fixed
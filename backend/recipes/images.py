@@ -0,0 +1,106 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.db import connection, transaction
+from PIL import Image, features
+
+from .models import Recipe
+from .versions import bump_version
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(max_workers=settings.IMAGE_WORKERS,
+                              thread_name_prefix='recipe-images')
+
+FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+
+WEBP_SUPPORTED = features.check('webp')
+
+
+def get_storage():
+    return Recipe._meta.get_field('image').storage
+
+
+def store_image(file):
+    field = Recipe._meta.get_field('image')
+    return field.storage.save(field.generate_filename(None, file.name), file)
+
+
+def variant_name(name, width, extension):
+    directory, filename = os.path.split(name)
+    stem, _ = os.path.splitext(filename)
+    return f'{directory}/variants/{stem}_{width}.{extension}'
+
+
+def save_variant(image, name, image_format):
+    if image_format in ('JPEG', 'WEBP') and image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.mode else 'RGB')
+    if image_format == 'JPEG' and image.mode == 'RGBA':
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, image_format, quality=settings.IMAGE_QUALITY)
+    storage = get_storage()
+    storage.delete(name)
+    return storage.save(name, buffer)
+
+
+def build_variants(name):
+    with get_storage().open(name) as file:
+        image = Image.open(file)
+        image.load()
+    image_format = image.format if image.format in FORMATS else 'PNG'
+    widths = [width for width in settings.IMAGE_VARIANT_WIDTHS
+              if width < image.width] or [image.width]
+    variants = {'webp': {}, 'default': {}}
+    for width in widths:
+        resized = image.copy()
+        resized.thumbnail((width, image.height))
+        if WEBP_SUPPORTED:
+            variants['webp'][width] = save_variant(
+                resized, variant_name(name, width, 'webp'), 'WEBP')
+        variants['default'][width] = save_variant(
+            resized, variant_name(name, width, FORMATS[image_format]),
+            image_format)
+    return {image_format: names
+            for image_format, names in variants.items() if names}
+
+
+def delete_variants(variants):
+    storage = get_storage()
+    for names in variants.values():
+        for name in names.values():
+            storage.delete(name)
+
+
+def delete_image(name, variants):
+    if name:
+        get_storage().delete(name)
+    delete_variants(variants or {})
+
+
+def process_recipe_image(recipe_id, name):
+    variants = build_variants(name)
+    updated = Recipe.objects.filter(pk=recipe_id, image=name).update(
+        image_variants=variants)
+    if not updated:
+        delete_variants(variants)
+    bump_version('recipes', f'recipe:{recipe_id}')
+    return bool(updated)
+
+
+def process_in_worker(recipe_id, name):
+    try:
+        process_recipe_image(recipe_id, name)
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', name)
+    finally:
+        connection.close()
+
+
+def schedule_variants(recipe):
+    if recipe.image:
+        transaction.on_commit(lambda: executor.submit(
+            process_in_worker, recipe.pk, recipe.image.name))
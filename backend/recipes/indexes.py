@@ -0,0 +1,31 @@
+from copy import copy
+
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models
+
+
+class SearchVectorIndex(GinIndex):
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().create_sql(model, schema_editor, using, **kwargs)
+        return models.Index.create_sql(self, model, schema_editor, using,
+                                       **kwargs)
+
+
+class CoveringIndex(models.Index):
+
+    def __init__(self, *, covering=(), **kwargs):
+        super().__init__(**kwargs)
+        self.covering = tuple(covering)
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        index = copy(self)
+        index.include = self.covering
+        return models.Index.create_sql(index, model, schema_editor, using,
+                                       **kwargs)
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        kwargs['covering'] = self.covering
+        return path, args, kwargs
@@ -0,0 +1,125 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from .models import DataImport
+
+
+def file_checksum(path, chunk_size=64 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_csv(path, fieldnames):
+    with open(path, encoding='utf-8', newline='') as file:
+        yield from csv.DictReader(file, fieldnames=fieldnames)
+
+
+def iter_json(path, chunk_size=64 * 1024):
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as file:
+        buffer = file.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError('Ожидается JSON-массив.')
+        buffer = buffer[1:]
+        while True:
+            buffer = buffer.lstrip().lstrip(',').lstrip()
+            if buffer.startswith(']'):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except ValueError:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    raise
+                buffer += chunk
+                continue
+            yield item
+            buffer = buffer[end:]
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            f'Ожидается целое число не меньше 1, получено {number}.')
+    return number
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class LoaderCommand(BaseCommand):
+    model = None
+    fieldnames = None
+    filenames = {}
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(self.filenames),
+                            default='csv')
+        parser.add_argument('--batch-size', type=positive_int,
+                            default=1000)
+        parser.add_argument('--force', action='store_true',
+                            help='Загрузить файл, даже если он не изменился')
+
+    def build(self, row):
+        return self.model(**row)
+
+    def after_load(self):
+        pass
+
+    def read_rows(self, path, file_format):
+        if file_format == 'json':
+            return iter_json(path)
+        return iter_csv(path, self.fieldnames)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть не меньше 1.')
+        filename = self.filenames[options['format']]
+        path = os.path.join(settings.CSV_FILES_DIR, filename)
+        try:
+            checksum = file_checksum(path)
+            if (not options['force'] and DataImport.objects.filter(
+                    source=filename, checksum=checksum).exists()):
+                self.stdout.write(f'{filename} уже загружен, пропускаем.')
+                return
+            total, elapsed = self.load(path, options)
+        except FileNotFoundError:
+            raise CommandError(f'Файл {filename} не найден.')
+        except UnicodeDecodeError:
+            raise CommandError(
+                'Не удается расшифровать файл в указанной кодировке.')
+        DataImport.objects.update_or_create(
+            source=filename, defaults={'checksum': checksum})
+        self.after_load()
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано {total} строк из {filename} за {elapsed:.2f} с '
+            f'({total / max(elapsed, 1e-9):.0f} строк/с), '
+            f'в базе {self.model.objects.count()} записей'))
+
+    def load(self, path, options):
+        start = time.perf_counter()
+        total = 0
+        rows = self.read_rows(path, options['format'])
+        for batch in batched(rows, options['batch_size']):
+            self.model.objects.bulk_create(
+                [self.build(row) for row in batch], ignore_conflicts=True)
+            total += len(batch)
+        return total, time.perf_counter() - start
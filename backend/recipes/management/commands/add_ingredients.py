@@ -1,32 +1,13 @@
-import csv
-
-from django.core.management.base import BaseCommand
-
-from foodgram.settings import CSV_FILES_DIR
+from recipes.loaders import LoaderCommand
 from recipes.models import Ingredient
+from recipes.versions import bump_version
 
 
-def import_data():
-    try:
-        with open(f'{CSV_FILES_DIR}/ingredients.csv',
-                  encoding='utf-8') as csvfile:
-            fieldnames = ['name', 'measurement_unit']
-            reader = csv.DictReader(csvfile, fieldnames=fieldnames)
-            for row in reader:
-                Ingredient.objects.create(
-                    name=row['name'],
-                    measurement_unit=row['measurement_unit'])
-    except FileNotFoundError:
-        print("Файл не найден.")
-    except UnicodeDecodeError:
-        print("Не удается расшифровать файл в указанной кодировке.")
-
-
-class Command(BaseCommand):
+class Command(LoaderCommand):
     help = 'Загрузка ингредиентов в базу данных'
+    model = Ingredient
+    fieldnames = ('name', 'measurement_unit')
+    filenames = {'csv': 'ingredients.csv', 'json': 'ingredients.json'}
 
-    def handle(self, *args, **options):
-        import_data()
-        self.stdout.write(self.style.SUCCESS(
-            f'В базу данных загружено '
-            f'{Ingredient.objects.count()} ингредиентов'))
+    def after_load(self):
+        bump_version('ingredients')
@@ -1,25 +1,13 @@
-import csv
-
-from django.core.management.base import BaseCommand
-
-from foodgram.settings import CSV_FILES_DIR
+from recipes.loaders import LoaderCommand
 from recipes.models import Tag
+from recipes.versions import bump_version
 
 
-class Command(BaseCommand):
+class Command(LoaderCommand):
     help = 'Загрузка тэгов рецептов в базу данных'
+    model = Tag
+    fieldnames = ('name', 'color', 'slug')
+    filenames = {'csv': 'tags.csv'}
 
-    def handle(self, *args, **kwargs):
-        with open(
-                f'{CSV_FILES_DIR}/tags.csv', encoding='utf-8'
-        ) as file:
-            csv_reader = csv.reader(file, delimiter=',', quotechar='"')
-            for row in csv_reader:
-                name = row[0]
-                color = row[1]
-                slug = row[2]
-                Tag.objects.create(
-                    name=name, color=color, slug=slug
-                )
-        print('Теги в базу данных загружены')
-        print('ADD', Tag.objects.count(), 'tags')
+    def after_load(self):
+        bump_version('tags')
@@ -0,0 +1,9 @@
+from recipes.loaders import LoaderCommand
+from recipes.models import UnitConversion
+
+
+class Command(LoaderCommand):
+    help = 'Загрузка таблицы перевода единиц измерения в базу данных'
+    model = UnitConversion
+    fieldnames = ('unit', 'base_unit', 'factor')
+    filenames = {'csv': 'units.csv'}
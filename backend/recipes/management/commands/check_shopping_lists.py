@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.shopping_list import compute_lines, rebuild_lines, stored_lines
+
+
+class Command(BaseCommand):
+    help = ('Сверка сохранённых списков покупок с полным пересчётом '
+            'по корзинам')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true',
+                            help='Пересобрать расходящиеся списки')
+
+    def handle(self, *args, **options):
+        expected = compute_lines()
+        stored = stored_lines()
+        broken = sorted(
+            user_id for user_id in expected.keys() | stored.keys()
+            if expected.get(user_id, {}) != stored.get(user_id, {}))
+        if not broken:
+            self.stdout.write(self.style.SUCCESS(
+                f'Списки покупок совпадают, пользователей: {len(expected)}'))
+            return
+        self.stdout.write(f'Расходятся списки пользователей: '
+                          f'{", ".join(map(str, broken))}')
+        if not options['fix']:
+            raise CommandError(f'Расхождений: {len(broken)}')
+        rebuild_lines(broken)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересобрано списков: {len(broken)}'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.loaders import batched, positive_int
+from recipes.models import Recipe
+from recipes.search import full_text_search_supported, update_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт поисковых векторов рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=positive_int, default=1000,
+                            help='Количество рецептов в одном UPDATE')
+
+    def handle(self, *args, **options):
+        if not full_text_search_supported():
+            raise CommandError('Полнотекстовый поиск доступен только '
+                               'в PostgreSQL')
+        updated = 0
+        pks = Recipe.objects.order_by('pk').values_list('pk', flat=True)
+        for batch in batched(pks.iterator(), options['batch_size']):
+            updated += update_search_vectors(
+                Recipe.objects.filter(pk__in=batch))
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено рецептов: {updated}'))
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.recommendations import update_similarities
+
+
+class Command(BaseCommand):
+    help = ('Пересчёт похожих рецептов по избранному и спискам покупок. '
+            'Запускайте периодически, например из cron раз в сутки')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int,
+                            default=settings.SIMILAR_RECIPES_COUNT,
+                            help='Сколько похожих рецептов хранить '
+                                 'для каждого рецепта')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Количество строк в одном INSERT')
+
+    def handle(self, *args, **options):
+        recipes, similarities = update_similarities(
+            options['top_k'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Рецептов с оценками: {recipes}, '
+            f'сохранено пар похожих рецептов: {similarities}'))
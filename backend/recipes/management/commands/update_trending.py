@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from recipes.trending import update_trending_scores
+
+
+class Command(BaseCommand):
+    help = ('Пересчёт популярности рецептов за последнее время. '
+            'Запускайте периодически, например из cron раз в 15 минут')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Количество рецептов в одном UPDATE')
+
+    def handle(self, *args, **options):
+        scored, reset = update_trending_scores(
+            batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено рецептов: {scored}, обнулено: {reset}'))
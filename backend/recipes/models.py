@@ -1,12 +1,18 @@
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import RowNumber
 from django.utils.translation import gettext_lazy as _
 
-from users.models import FoodgramUser
+from users.models import FoodgramUser, Subscription
 from .validators import (
     validate_name, validate_hex_color, validate_recipe_name,
-    validate_cooking_time, validate_amount)
+    validate_cooking_time, validate_amount, validate_servings)
 from .constants import CHAR_LENGTH, TEXT_LENGTH, COLOR_LENGTH
+from .indexes import CoveringIndex, SearchVectorIndex
+from .mixins import CounterFieldsMixin
 
 
 class Tag(models.Model):
@@ -36,6 +42,29 @@ class Tag(models.Model):
         return self.name
 
 
+class UnitConversion(models.Model):
+    unit = models.CharField(
+        verbose_name=_('Единица измерения'),
+        max_length=CHAR_LENGTH,
+        unique=True
+    )
+    base_unit = models.CharField(
+        verbose_name=_('Базовая единица измерения'),
+        max_length=CHAR_LENGTH
+    )
+    factor = models.PositiveIntegerField(
+        verbose_name=_('Количество базовых единиц в одной единице')
+    )
+
+    class Meta:
+        verbose_name = _('Перевод единиц измерения')
+        verbose_name_plural = _('Переводы единиц измерения')
+        ordering = ('unit',)
+
+    def __str__(self):
+        return f'1 {self.unit} = {self.factor} {self.base_unit}'
+
+
 class Ingredient(models.Model):
     name = models.CharField(
         verbose_name=_('Название ингредиента'),
@@ -48,6 +77,14 @@ class Ingredient(models.Model):
         max_length=CHAR_LENGTH,
         help_text='Введите единицу измерения'
     )
+    unit_conversion = models.ForeignObject(
+        UnitConversion,
+        on_delete=models.DO_NOTHING,
+        from_fields=['measurement_unit'],
+        to_fields=['unit'],
+        null=True,
+        related_name='+'
+    )
 
     class Meta:
         verbose_name = _('Ингредиент')
@@ -62,7 +99,92 @@ class Ingredient(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+def recipe_prefetches():
+    return (
+        'tags',
+        models.Prefetch(
+            'ingredientes',
+            queryset=RecipeIngredient.objects.select_related('ingredient')
+        ),
+    )
+
+
+class RecipeQuerySet(models.QuerySet):
+
+    def with_relations(self):
+        return self.select_related('author').defer(
+            'search_vector').prefetch_related(*recipe_prefetches())
+
+    def with_user_flags(self, user):
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=models.Value(False),
+                is_in_shopping_cart=models.Value(False),
+            )
+        return self.annotate(
+            is_favorited=models.Exists(Favorite.objects.filter(
+                user=user, recipe=models.OuterRef('pk'))),
+            is_in_shopping_cart=models.Exists(ShoppingCart.objects.filter(
+                user=user, recipe=models.OuterRef('pk'))),
+            author_is_subscribed=models.Exists(Subscription.objects.filter(
+                user=user, author=models.OuterRef('author'))),
+        )
+
+    def for_feed(self, user):
+        return self.with_relations().with_user_flags(user)
+
+    def minified(self):
+        return self.only('id', 'name', 'image', 'image_variants',
+                         'cooking_time')
+
+    def similar_to(self, recipe):
+        return self.filter(similar_for__recipe=recipe).order_by(
+            '-similar_for__score')
+
+    def unseen_by(self, user):
+        return self.exclude(
+            pk__in=Favorite.objects.filter(user=user).values('recipe')
+        ).exclude(
+            pk__in=ShoppingCart.objects.filter(user=user).values('recipe'))
+
+    def recommended_for(self, user):
+        return self.unseen_by(user).filter(
+            models.Q(similar_for__recipe__in=Favorite.objects.filter(
+                user=user).values('recipe'))
+            | models.Q(similar_for__recipe__in=ShoppingCart.objects.filter(
+                user=user).values('recipe'))
+        ).annotate(
+            recommendation_score=models.Sum('similar_for__score')
+        ).order_by('-recommendation_score', '-pub_date', '-id')
+
+    def latest_by_author(self, authors, limit=None):
+        if not authors:
+            return self.none()
+        queryset = self.filter(author__in=authors)
+        if limit is None:
+            return queryset
+        queryset = queryset.annotate(row_number=models.Window(
+            RowNumber(),
+            partition_by=models.F('author'),
+            order_by=(models.F('pub_date').desc(), models.F('id').desc()),
+        ))
+        sql, params = queryset.query.sql_with_params()
+        return self.raw(
+            f'SELECT * FROM ({sql}) ranked WHERE row_number <= %s '
+            f'ORDER BY pub_date DESC, id DESC',
+            (*params, limit))
+
+    def prefetch_for_authors(self, authors, limit=None):
+        if not authors:
+            return
+        recipes = defaultdict(list)
+        for recipe in self.latest_by_author(authors, limit):
+            recipes[recipe.author_id].append(recipe)
+        for author in authors:
+            author.latest_recipes = recipes[author.id]
+
+
+class Recipe(CounterFieldsMixin, models.Model):
     tags = models.ManyToManyField(
         Tag,
         verbose_name=_('Список тегов'),
@@ -87,6 +209,12 @@ class Recipe(models.Model):
         null=True,
         help_text='Загрузите картинку'
     )
+    image_variants = models.JSONField(
+        verbose_name=_('Уменьшенные копии картинки'),
+        default=dict,
+        blank=True,
+        editable=False
+    )
     text = models.CharField(
         verbose_name=_('Описание'),
         max_length=TEXT_LENGTH,
@@ -103,12 +231,53 @@ class Recipe(models.Model):
         db_index=True,
         editable=False
     )
+    updated_at = models.DateTimeField(
+        verbose_name=_('Дата изменения'),
+        auto_now=True,
+        db_index=True
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name=_('Количество в избранных'),
+        default=0,
+        editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name=_('Количество в корзинах'),
+        default=0,
+        editable=False
+    )
+    trending_score = models.FloatField(
+        verbose_name=_('Популярность за последнее время'),
+        default=0,
+        editable=False
+    )
+    search_vector = SearchVectorField(
+        verbose_name=_('Поисковый вектор'),
+        null=True,
+        editable=False
+    )
+
+    objects = RecipeQuerySet.as_manager()
+
+    counter_fields = ('favorites_count', 'in_carts_count', 'trending_score')
 
     class Meta:
         verbose_name = _('Рецепт')
         verbose_name_plural = _('Рецепты')
         ordering = ('-pub_date',)
         default_related_name = 'recipes'
+        indexes = [
+            models.Index(fields=['-favorites_count', '-pub_date'],
+                         name='recipe_popular_idx'),
+            models.Index(fields=['-trending_score', '-pub_date'],
+                         name='recipe_trending_idx'),
+            models.Index(fields=['cooking_time', '-pub_date'],
+                         name='recipe_cooking_time_idx'),
+            models.Index(fields=['author', '-pub_date'],
+                         name='recipe_author_pub_date_idx'),
+            SearchVectorIndex(fields=['search_vector'],
+                              name='recipe_search_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -152,6 +321,11 @@ class Favorite(models.Model):
         verbose_name=_('Рецепт'),
         help_text='Рецепт',
     )
+    added_at = models.DateTimeField(
+        verbose_name=_('Дата добавления'),
+        auto_now_add=True,
+        db_index=True
+    )
 
     class Meta:
         verbose_name = _('Избранное')
@@ -179,6 +353,12 @@ class ShoppingCart(models.Model):
         verbose_name=_('Рецепт'),
         help_text='Рецепт',
     )
+    servings = models.PositiveSmallIntegerField(
+        verbose_name=_('Количество порций'),
+        validators=(validate_servings,),
+        default=1,
+        help_text='Во сколько раз увеличить количество ингредиентов'
+    )
 
     class Meta:
         verbose_name = _('Корзина покупок')
@@ -186,6 +366,110 @@ class ShoppingCart(models.Model):
             models.UniqueConstraint(fields=['user', 'recipe'],
                                     name='unique_shopping_cart')
         ]
+        indexes = [
+            CoveringIndex(fields=['user'], covering=['recipe', 'servings'],
+                          name='shopping_cart_user_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user} >> {self.recipe}'
+
+
+class ShoppingListLine(models.Model):
+    user = models.ForeignKey(
+        FoodgramUser,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_lines',
+        verbose_name=_('Пользователь'),
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('Ингредиент'),
+    )
+    total_amount = models.BigIntegerField(
+        verbose_name=_('Количество'),
+        default=0
+    )
+
+    class Meta:
+        verbose_name = _('Строка списка покупок')
+        verbose_name_plural = _('Строки списка покупок')
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'ingredient'],
+                                    name='unique_shopping_list_line')
+        ]
+
+    def __str__(self):
+        return f'{self.user} >> {self.ingredient}'
+
+
+class RecipeSimilarity(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similarities',
+        verbose_name=_('Рецепт'),
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_for',
+        verbose_name=_('Похожий рецепт'),
+    )
+    score = models.FloatField(
+        verbose_name=_('Сходство')
+    )
+
+    class Meta:
+        verbose_name = _('Похожий рецепт')
+        verbose_name_plural = _('Похожие рецепты')
+        indexes = [
+            models.Index(fields=['recipe', '-score'],
+                         name='recipe_similarity_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} >> {self.similar}'
+
+
+class DataImport(models.Model):
+    source = models.CharField(
+        verbose_name=_('Файл с данными'),
+        max_length=CHAR_LENGTH,
+        unique=True
+    )
+    checksum = models.CharField(
+        verbose_name=_('Контрольная сумма'),
+        max_length=64
+    )
+    imported_at = models.DateTimeField(
+        verbose_name=_('Дата загрузки'),
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = _('Загрузка данных')
+        verbose_name_plural = _('Загрузки данных')
+
+    def __str__(self):
+        return self.source
+
+
+class CacheVersion(models.Model):
+    name = models.CharField(
+        verbose_name=_('Имя'),
+        max_length=CHAR_LENGTH,
+        primary_key=True
+    )
+    version = models.BigIntegerField(
+        verbose_name=_('Версия')
+    )
+
+    class Meta:
+        verbose_name = _('Версия кэша')
+        verbose_name_plural = _('Версии кэшей')
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
@@ -0,0 +1,70 @@
+from itertools import chain
+
+import numpy as np
+from django.db import transaction
+from scipy import sparse
+
+from .loaders import batched
+from .models import Favorite, RecipeSimilarity, ShoppingCart
+
+FAVORITE_WEIGHT = 1.0
+SHOPPING_CART_WEIGHT = 0.5
+
+
+def interactions(model):
+    pairs = model.objects.order_by().values_list('user_id', 'recipe_id')
+    values = np.fromiter(
+        chain.from_iterable(pairs.iterator(chunk_size=10000)),
+        dtype=np.int64)
+    return values.reshape(-1, 2)
+
+
+def interaction_matrix():
+    favorites = interactions(Favorite)
+    carts = interactions(ShoppingCart)
+    pairs = np.concatenate([favorites, carts])
+    weights = np.concatenate([
+        np.full(len(favorites), FAVORITE_WEIGHT),
+        np.full(len(carts), SHOPPING_CART_WEIGHT),
+    ])
+    recipe_ids, rows = np.unique(pairs[:, 1], return_inverse=True)
+    user_ids, columns = np.unique(pairs[:, 0], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (weights, (rows.ravel(), columns.ravel())),
+        shape=(len(recipe_ids), len(user_ids)))
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    return recipe_ids, sparse.diags(1 / norms).dot(matrix).tocsr()
+
+
+def nearest_neighbours(matrix, top_k, chunk_size=1000):
+    transposed = matrix.T.tocsr()
+    for start in range(0, matrix.shape[0], chunk_size):
+        block = matrix[start:start + chunk_size].dot(transposed).tocsr()
+        for offset in range(block.shape[0]):
+            begin, end = block.indptr[offset], block.indptr[offset + 1]
+            indices = block.indices[begin:end]
+            scores = block.data[begin:end]
+            other = indices != start + offset
+            indices, scores = indices[other], scores[other]
+            if len(scores) > top_k:
+                best = np.argpartition(-scores, top_k)[:top_k]
+                indices, scores = indices[best], scores[best]
+            yield start + offset, indices, np.minimum(scores, 1.0)
+
+
+def update_similarities(top_k, batch_size=5000):
+    recipe_ids, matrix = interaction_matrix()
+    similarities = (
+        RecipeSimilarity(recipe_id=int(recipe_ids[row]),
+                         similar_id=int(recipe_ids[index]),
+                         score=float(score))
+        for row, indices, scores in nearest_neighbours(matrix, top_k)
+        for index, score in zip(indices, scores)
+    )
+    created = 0
+    with transaction.atomic():
+        RecipeSimilarity.objects.all().delete()
+        for batch in batched(similarities, batch_size):
+            RecipeSimilarity.objects.bulk_create(batch)
+            created += len(batch)
+    return len(recipe_ids), created
@@ -0,0 +1,51 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection, models
+
+from .models import RecipeIngredient
+
+SEARCH_CONFIG = 'russian'
+
+
+def full_text_search_supported():
+    return connection.vendor == 'postgresql'
+
+
+def recipe_search_vector():
+    ingredient_names = RecipeIngredient.objects.filter(
+        recipe=models.OuterRef('pk')
+    ).order_by().values('recipe').annotate(
+        names=StringAgg('ingredient__name', ' ')
+    ).values('names')
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(models.Subquery(ingredient_names), weight='B',
+                       config=SEARCH_CONFIG)
+        + SearchVector('text', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(queryset):
+    if not full_text_search_supported():
+        return 0
+    return queryset.update(search_vector=recipe_search_vector())
+
+
+def substring_search(queryset, value):
+    return queryset.filter(
+        models.Q(name__icontains=value)
+        | models.Q(text__icontains=value)
+        | models.Exists(RecipeIngredient.objects.filter(
+            recipe=models.OuterRef('pk'),
+            ingredient__name__icontains=value))
+    )
+
+
+def search_recipes(queryset, value):
+    if not full_text_search_supported():
+        return substring_search(queryset, value)
+    query = SearchQuery(value, config=SEARCH_CONFIG, search_type='websearch')
+    return queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(models.F('search_vector'), query)
+    ).order_by('-rank', '-pub_date', '-id')
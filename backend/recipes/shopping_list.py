@@ -0,0 +1,96 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, OuterRef, Subquery, Sum, Value, When
+
+from .models import RecipeIngredient, ShoppingCart, ShoppingListLine
+
+
+def add_to_lines(user_id, deltas):
+    deltas = {ingredient_id: delta
+              for ingredient_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    with transaction.atomic():
+        ShoppingListLine.objects.bulk_create(
+            [ShoppingListLine(user_id=user_id, ingredient_id=ingredient_id)
+             for ingredient_id, delta in deltas.items() if delta > 0],
+            ignore_conflicts=True)
+        lines = ShoppingListLine.objects.filter(user_id=user_id,
+                                                ingredient_id__in=deltas)
+        lines.update(total_amount=F('total_amount') + Case(
+            *[When(ingredient_id=ingredient_id, then=Value(delta))
+              for ingredient_id, delta in deltas.items()],
+            default=Value(0)))
+        lines.filter(total_amount__lte=0).delete()
+
+
+def apply_cart_changes(user_id, servings_by_recipe):
+    deltas = Counter()
+    rows = RecipeIngredient.objects.filter(
+        recipe_id__in=servings_by_recipe
+    ).values_list('recipe_id', 'ingredient_id', 'amount')
+    for recipe_id, ingredient_id, amount in rows:
+        deltas[ingredient_id] += amount * servings_by_recipe[recipe_id]
+    add_to_lines(user_id, deltas)
+
+
+def apply_recipe_changes(recipe_id, deltas):
+    deltas = {ingredient_id: delta
+              for ingredient_id, delta in deltas.items() if delta}
+    carts = ShoppingCart.objects.filter(recipe_id=recipe_id)
+    user_ids = list(carts.values_list('user_id', flat=True))
+    if not deltas or not user_ids:
+        return
+    servings = carts.filter(user=OuterRef('user')).values('servings')[:1]
+    with transaction.atomic():
+        ShoppingListLine.objects.bulk_create(
+            [ShoppingListLine(user_id=user_id, ingredient_id=ingredient_id)
+             for user_id in user_ids
+             for ingredient_id, delta in deltas.items() if delta > 0],
+            ignore_conflicts=True)
+        lines = ShoppingListLine.objects.filter(user_id__in=user_ids,
+                                                ingredient_id__in=deltas)
+        for ingredient_id, delta in deltas.items():
+            lines.filter(ingredient_id=ingredient_id).update(
+                total_amount=F('total_amount') + delta * Subquery(servings))
+        lines.filter(total_amount__lte=0).delete()
+
+
+def compute_lines(user_ids=None):
+    condition = {'recipe__shoppingcart__isnull': False}
+    if user_ids is not None:
+        condition = {'recipe__shoppingcart__user_id__in': user_ids}
+    rows = RecipeIngredient.objects.filter(**condition).values(
+        'recipe__shoppingcart__user_id', 'ingredient_id'
+    ).annotate(
+        total=Sum(F('amount') * F('recipe__shoppingcart__servings'))
+    ).order_by()
+    lines = defaultdict(dict)
+    for row in rows.iterator():
+        lines[row['recipe__shoppingcart__user_id']][
+            row['ingredient_id']] = row['total']
+    return lines
+
+
+def stored_lines(user_ids=None):
+    rows = ShoppingListLine.objects.all()
+    if user_ids is not None:
+        rows = rows.filter(user_id__in=user_ids)
+    lines = defaultdict(dict)
+    for user_id, ingredient_id, total in rows.values_list(
+            'user_id', 'ingredient_id', 'total_amount').iterator():
+        lines[user_id][ingredient_id] = total
+    return lines
+
+
+def rebuild_lines(user_ids):
+    expected = compute_lines(user_ids)
+    with transaction.atomic():
+        ShoppingListLine.objects.filter(user_id__in=user_ids).delete()
+        ShoppingListLine.objects.bulk_create(
+            [ShoppingListLine(user_id=user_id, ingredient_id=ingredient_id,
+                              total_amount=total)
+             for user_id, totals in expected.items()
+             for ingredient_id, total in totals.items()],
+            batch_size=1000)
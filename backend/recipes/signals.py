@@ -0,0 +1,188 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from users.models import FoodgramUser, Subscription
+from .models import (
+    Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag)
+from .counters import apply_counters, change_counter
+from .images import delete_image
+from .search import update_search_vectors
+from .shopping_list import apply_cart_changes, apply_recipe_changes
+from .versions import bump_version
+
+
+def touch_recipes(recipes):
+    Recipe.objects.filter(pk__in=recipes).update(updated_at=timezone.now())
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredients_changed(**kwargs):
+    bump_version('ingredients')
+
+
+@receiver(pre_delete, sender=Ingredient)
+def ingredient_deleting(instance, **kwargs):
+    touch_recipes(RecipeIngredient.objects.filter(
+        ingredient=instance).values('recipe_id'))
+    bump_version('recipe_ingredients', 'recipe_features')
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_renamed(instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        update_search_vectors(
+            Recipe.objects.filter(ingredientes__ingredient=instance))
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tags_changed(**kwargs):
+    bump_version('tags')
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleting(instance, **kwargs):
+    touch_recipes(Recipe.tags.through.objects.filter(
+        tag=instance).values('recipe_id'))
+    bump_version('recipe_features')
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_changed(instance, **kwargs):
+    bump_version('recipes', f'recipe:{instance.pk}')
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(instance, **kwargs):
+    name, variants = instance.image.name, instance.image_variants
+    transaction.on_commit(lambda: delete_image(name, variants))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredient_changed(instance, **kwargs):
+    bump_version('recipes', f'recipe:{instance.recipe_id}')
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredients_changed(**kwargs):
+    bump_version('recipe_ingredients', 'recipe_features')
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        instance.cleared_recipes = list(Recipe.tags.through.objects.filter(
+            tag=instance).values_list('recipe_id', flat=True))
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        bump_version('recipes', 'tags')
+        recipes = pk_set or getattr(instance, 'cleared_recipes', ())
+    else:
+        bump_version('recipes', f'recipe:{instance.pk}')
+        recipes = (instance.pk,)
+    touch_recipes(recipes)
+    bump_version('recipe_features')
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+@receiver((post_save, post_delete), sender=Subscription)
+def user_relations_changed(instance, **kwargs):
+    bump_version(f'user:{instance.user_id}')
+
+
+@receiver((post_save, post_delete), sender=FoodgramUser)
+def user_changed(created=False, update_fields=None, **kwargs):
+    if created or update_fields and set(update_fields) == {'last_login'}:
+        return
+    bump_version('users')
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Subscription)
+@receiver(post_save, sender=Recipe)
+def counted_relation_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        apply_counters(sender, [instance], 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Subscription)
+@receiver(post_delete, sender=Recipe)
+def counted_relation_deleted(sender, instance, **kwargs):
+    apply_counters(sender, [instance], -1)
+
+
+@receiver(pre_save, sender=Recipe)
+def recipe_author_changing(instance, update_fields=None, **kwargs):
+    if instance.pk is None:
+        return
+    if update_fields is not None and 'author' not in update_fields:
+        return
+    old_author_id = Recipe.objects.filter(pk=instance.pk).values_list(
+        'author_id', flat=True).first()
+    if old_author_id not in (None, instance.author_id):
+        change_counter(FoodgramUser, 'recipes_count', [old_author_id], -1)
+        change_counter(FoodgramUser, 'recipes_count',
+                       [instance.author_id], 1)
+
+
+@receiver(pre_save, sender=ShoppingCart)
+def shopping_cart_changing(instance, raw=False, **kwargs):
+    if not instance._state.adding and not raw:
+        instance.previous = ShoppingCart.objects.filter(
+            pk=instance.pk).values('user_id', 'recipe_id', 'servings').first()
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_saved(instance, raw=False, **kwargs):
+    if raw:
+        return
+    current = {'user_id': instance.user_id, 'recipe_id': instance.recipe_id,
+               'servings': instance.servings}
+    previous = getattr(instance, 'previous', None)
+    if previous == current:
+        return
+    if previous is not None:
+        apply_cart_changes(previous['user_id'],
+                           {previous['recipe_id']: -previous['servings']})
+    apply_cart_changes(instance.user_id,
+                       {instance.recipe_id: instance.servings})
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_cart_deleted(instance, **kwargs):
+    apply_cart_changes(instance.user_id,
+                       {instance.recipe_id: -instance.servings})
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def recipe_ingredient_changing(instance, raw=False, **kwargs):
+    if not instance._state.adding and not raw:
+        instance.previous = RecipeIngredient.objects.filter(
+            pk=instance.pk).values('ingredient_id', 'amount').first()
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def recipe_ingredient_saved(instance, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = Counter({instance.ingredient_id: instance.amount})
+    previous = getattr(instance, 'previous', None)
+    if previous is not None:
+        deltas[previous['ingredient_id']] -= previous['amount']
+    apply_recipe_changes(instance.recipe_id, deltas)
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def recipe_ingredient_deleted(instance, **kwargs):
+    apply_recipe_changes(instance.recipe_id,
+                         {instance.ingredient_id: -instance.amount})
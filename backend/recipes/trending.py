@@ -0,0 +1,41 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .loaders import batched
+from .models import Favorite, Recipe
+from .versions import bump_version
+
+
+def trending_scores(now=None):
+    now = now or timezone.now()
+    half_life = settings.TRENDING_HALF_LIFE_HOURS * 3600
+    since = now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    buckets = Favorite.objects.filter(added_at__gte=since).annotate(
+        hour=TruncHour('added_at')
+    ).values('recipe', 'hour').annotate(count=Count('pk')).order_by()
+    scores = defaultdict(float)
+    for bucket in buckets.iterator():
+        age = (now - bucket['hour']).total_seconds()
+        scores[bucket['recipe']] += bucket['count'] * 0.5 ** (age / half_life)
+    return scores
+
+
+def update_trending_scores(now=None, batch_size=1000):
+    scores = trending_scores(now)
+    stale = set(Recipe.objects.filter(trending_score__gt=0).values_list(
+        'pk', flat=True)) - scores.keys()
+    with transaction.atomic():
+        for pks in batched(sorted(stale), batch_size):
+            Recipe.objects.filter(pk__in=pks).update(trending_score=0)
+        Recipe.objects.bulk_update(
+            [Recipe(pk=pk, trending_score=score)
+             for pk, score in scores.items()],
+            ['trending_score'], batch_size=batch_size)
+    bump_version('recipes')
+    return len(scores), len(stale)
@@ -2,7 +2,7 @@ import re
 
 from django.core.exceptions import ValidationError
 
-from .constants import (SCORE_MIN, AMOUNT_SCORE_MAX, SCORE_MAX)
+from .constants import (SCORE_MIN, AMOUNT_SCORE_MAX, SCORE_MAX, SERVINGS_MAX)
 
 
 def validate_name(value):
@@ -52,3 +52,13 @@ def validate_cooking_time(value):
         raise ValidationError(
             'Время готовки не должно быть больше суток')
     return value
+
+
+def validate_servings(value):
+    if int(value) < SCORE_MIN:
+        raise ValidationError(f'Количество порций не '
+                              f'должно быть меньше {SCORE_MIN}.')
+    if int(value) > SERVINGS_MAX:
+        raise ValidationError(f'Количество порций не должно '
+                              f'быть больше {SERVINGS_MAX}.')
+    return value
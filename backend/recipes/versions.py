@@ -0,0 +1,74 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+
+from .models import CacheVersion
+
+current_versions = ContextVar('current_versions', default=None)
+
+
+def _now():
+    return time.time_ns() // 1000
+
+
+def _stamps(names):
+    return dict(CacheVersion.objects.filter(
+        name__in=names).values_list('name', 'version'))
+
+
+def get_version(name):
+    return get_versions(name)[0]
+
+
+@contextmanager
+def version_snapshot():
+    token = current_versions.set({})
+    try:
+        yield
+    finally:
+        current_versions.reset(token)
+
+
+def get_versions(*names):
+    snapshot = current_versions.get()
+    if snapshot is None:
+        return _load(names)
+    missing = [name for name in dict.fromkeys(names)
+               if name not in snapshot]
+    if missing:
+        snapshot.update(zip(missing, _load(missing)))
+    return [snapshot[name] for name in names]
+
+
+def _load(names):
+    versions = _stamps(names)
+    missing = [name for name in dict.fromkeys(names)
+               if name not in versions]
+    if missing:
+        version = _now()
+        CacheVersion.objects.bulk_create(
+            [CacheVersion(name=name, version=version) for name in missing],
+            ignore_conflicts=True)
+        versions.update(_stamps(missing))
+    return [versions[name] for name in names]
+
+
+def _bump(names):
+    version = _now()
+    updated = CacheVersion.objects.filter(name__in=names).update(
+        version=version)
+    if updated < len(set(names)):
+        CacheVersion.objects.bulk_create(
+            [CacheVersion(name=name, version=version)
+             for name in dict.fromkeys(names)],
+            ignore_conflicts=True)
+    snapshot = current_versions.get()
+    if snapshot is not None:
+        for name in names:
+            snapshot.pop(name, None)
+
+
+def bump_version(*names):
+    transaction.on_commit(lambda: _bump(names))
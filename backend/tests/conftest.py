@@ -0,0 +1,79 @@
+import pytest
+from django.core.cache import caches
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import FoodgramUser
+
+
+def create_user(username):
+    return FoodgramUser.objects.create_user(
+        username=username, email=f'{username}@foodgram.ru',
+        password='Foodgram-password-1', first_name='Иван',
+        last_name='Иванов')
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    yield
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture
+def user(db):
+    return create_user('user')
+
+
+@pytest.fixture
+def author(db):
+    return create_user('author')
+
+
+@pytest.fixture
+def tags(db):
+    return [Tag.objects.create(name=name, color=color, slug=slug)
+            for name, color, slug in (('Завтрак', '#E26C2D', 'breakfast'),
+                                      ('Обед', '#49B64E', 'lunch'))]
+
+
+@pytest.fixture
+def ingredients(db):
+    return [Ingredient.objects.create(name=f'Ингредиент {index}',
+                                      measurement_unit='г')
+            for index in range(5)]
+
+
+@pytest.fixture
+def make_recipe(author, tags, ingredients):
+    def make(name='Рецепт', amounts=(100, 200, 300), recipe_author=None):
+        recipe = Recipe.objects.create(
+            author=recipe_author or author, name=name,
+            text='Описание', cooking_time=10,
+            image='recipes/images/recipe.jpg')
+        recipe.tags.set(tags)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                             amount=amount)
+            for ingredient, amount in zip(ingredients, amounts))
+        return recipe
+    return make
+
+
+@pytest.fixture
+def anonymous_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def author_client(author):
+    client = APIClient()
+    client.force_authenticate(author)
+    return client
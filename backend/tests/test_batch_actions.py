@@ -0,0 +1,71 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from recipes.shopping_list import stored_lines
+
+
+def test_batch_add_counts_only_new_rows(make_recipe, user, user_client):
+    first, second = make_recipe('Первый'), make_recipe('Второй')
+    Favorite.objects.create(user=user, recipe=first)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.post(
+            '/api/recipes/favorite/',
+            {'recipes': [first.pk, second.pk, 404]}, format='json')
+
+    assert response.status_code == 200
+    assert response.data['results'] == [
+        {'id': first.pk, 'status': 'exists'},
+        {'id': second.pk, 'status': 'added'},
+        {'id': 404, 'status': 'not_found'},
+    ]
+    assert dict(Recipe.objects.values_list('pk', 'favorites_count')) == {
+        first.pk: 1, second.pk: 1}
+    if connection.features.has_select_for_update:
+        assert any(query['sql'].startswith('SELECT')
+                   and query['sql'].endswith('FOR UPDATE')
+                   for query in queries.captured_queries)
+
+
+def test_batch_cart_add_and_remove(make_recipe, user, user_client):
+    first, second = make_recipe('Первый'), make_recipe('Второй')
+    ShoppingCart.objects.create(user=user, recipe=first)
+    expected = stored_lines([user.pk])
+
+    response = user_client.post('/api/recipes/shopping_cart/',
+                                {'recipes': [first.pk, second.pk]},
+                                format='json')
+    assert response.status_code == 200
+    assert dict(Recipe.objects.values_list('pk', 'in_carts_count')) == {
+        first.pk: 1, second.pk: 1}
+
+    response = user_client.delete('/api/recipes/shopping_cart/',
+                                  {'recipes': [second.pk]}, format='json')
+    assert response.data['results'] == [
+        {'id': second.pk, 'status': 'removed'}]
+    assert dict(Recipe.objects.values_list('pk', 'in_carts_count')) == {
+        first.pk: 1, second.pk: 0}
+    assert stored_lines([user.pk]) == expected
+
+
+def test_batch_remove_is_set_based(make_recipe, user, user_client,
+                                   django_assert_max_num_queries):
+    recipes = [make_recipe(f'Рецепт {index}') for index in range(5)]
+    for recipe in recipes:
+        ShoppingCart.objects.create(user=user, recipe=recipe, servings=2)
+        Favorite.objects.create(user=user, recipe=recipe)
+    ids = [recipe.pk for recipe in recipes]
+
+    for url in ('/api/recipes/favorite/', '/api/recipes/shopping_cart/'):
+        with django_assert_max_num_queries(13):
+            response = user_client.delete(url, {'recipes': ids},
+                                          format='json')
+        assert [item['status'] for item in response.data['results']] == [
+            'removed'] * 5
+
+    assert not Favorite.objects.filter(user=user).exists()
+    assert not ShoppingCart.objects.filter(user=user).exists()
+    assert set(Recipe.objects.values_list(
+        'favorites_count', 'in_carts_count')) == {(0, 0)}
+    assert stored_lines([user.pk]) == {}
@@ -0,0 +1,51 @@
+import pytest
+
+
+@pytest.fixture
+def cookable(user, ingredients, make_recipe,
+             django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        return {
+            'three': make_recipe('Три', amounts=(100, 200, 300)),
+            'two': make_recipe('Два', amounts=(100, 200)),
+            'four': make_recipe('Четыре', amounts=(100, 200, 300, 400)),
+            'all': make_recipe('Все', amounts=(1, 2, 3, 4, 5)),
+            'foreign': make_recipe('Чужой', amounts=(100, 200),
+                                   recipe_author=user),
+        }
+
+
+def get_names(client, ingredients, query=''):
+    have = ','.join(str(ingredient.pk) for ingredient in ingredients[:3])
+    response = client.get(
+        f'/api/recipes/?has_ingredients={have}&missing_max=1{query}')
+    assert response.status_code == 200
+    return response.data['count'], [
+        recipe['name'] for recipe in response.data['results']]
+
+
+def test_ranked_by_missing_then_newest(cookable, ingredients,
+                                       anonymous_client):
+    assert get_names(anonymous_client, ingredients) == (
+        4, ['Чужой', 'Два', 'Три', 'Четыре'])
+    assert get_names(anonymous_client, ingredients, '&limit=3&page=2') == (
+        4, ['Четыре'])
+
+
+def test_ranked_page_respects_other_filters(cookable, ingredients, author,
+                                            anonymous_client):
+    assert get_names(anonymous_client, ingredients,
+                     f'&author={author.pk}&limit=2') == (3, ['Два', 'Три'])
+
+
+def test_only_the_page_is_loaded(cookable, ingredients, anonymous_client,
+                                 django_assert_max_num_queries):
+    with django_assert_max_num_queries(10) as queries:
+        get_names(anonymous_client, ingredients, '&limit=1')
+    recipe_query = next(
+        query['sql'] for query in queries.captured_queries
+        if query['sql'].startswith('SELECT "recipes_recipe"."id"')
+        and '"recipes_recipe"."name"' in query['sql'])
+    assert f'"recipes_recipe"."id" IN ({cookable["foreign"].pk})' in (
+        recipe_query)
+    assert 'CASE' not in recipe_query
@@ -0,0 +1,48 @@
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import FoodgramUser, Subscription
+
+
+def test_full_recipe_save_keeps_counters(user, make_recipe):
+    recipe = make_recipe()
+    stale = Recipe.objects.get(pk=recipe.pk)
+    Favorite.objects.create(user=user, recipe=recipe)
+    ShoppingCart.objects.create(user=user, recipe=recipe)
+    Recipe.objects.filter(pk=recipe.pk).update(trending_score=1.5)
+
+    stale.name = 'Новое название'
+    stale.save()
+
+    recipe.refresh_from_db()
+    assert recipe.name == 'Новое название'
+    assert (recipe.favorites_count, recipe.in_carts_count,
+            recipe.trending_score) == (1, 1, 1.5)
+
+
+def test_profile_update_keeps_counters(user, author, make_recipe):
+    stale = FoodgramUser.objects.get(pk=author.pk)
+    make_recipe()
+    Subscription.objects.create(user=user, author=author)
+
+    stale.first_name = 'Петр'
+    stale.save()
+
+    author.refresh_from_db()
+    assert author.first_name == 'Петр'
+    assert (author.recipes_count, author.followers_count) == (1, 1)
+
+
+def test_admin_shows_counters_read_only(author, make_recipe, client):
+    recipe = make_recipe()
+    admin = FoodgramUser.objects.create_superuser(
+        username='admin', email='admin@foodgram.ru', password='Admin-1',
+        first_name='Админ', last_name='Админов')
+    client.force_login(admin)
+
+    for url, field in ((f'/admin/recipes/recipe/{recipe.pk}/change/',
+                        'favorites_count'),
+                       (f'/admin/users/foodgramuser/{author.pk}/change/',
+                        'followers_count')):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert f'field-{field}' in response.content.decode()
+        assert f'name="{field}"' not in response.content.decode()
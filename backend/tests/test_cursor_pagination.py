@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+
+from recipes.models import Recipe
+
+PUB_DATE = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+
+def walk(client, url, link='next'):
+    names = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        names.append([recipe['name'] for recipe in response.data['results']])
+        url = response.data[link]
+    return names
+
+
+def test_cursor_walks_recipes_with_the_same_pub_date(make_recipe,
+                                                     user_client):
+    recipes = [make_recipe(f'Рецепт {index}') for index in range(8)]
+    Recipe.objects.update(pub_date=PUB_DATE)
+    names = [recipe.name for recipe in reversed(recipes)]
+
+    pages = walk(user_client, '/api/recipes/?pagination=cursor&limit=3')
+
+    assert pages == [names[:3], names[3:6], names[6:]]
+
+
+def test_previous_link_returns_to_the_earlier_page(make_recipe,
+                                                   user_client):
+    recipes = [make_recipe(f'Рецепт {index}') for index in range(5)]
+    Recipe.objects.update(pub_date=PUB_DATE)
+    names = [recipe.name for recipe in reversed(recipes)]
+    first = user_client.get('/api/recipes/?pagination=cursor&limit=2')
+    last = user_client.get(
+        user_client.get(first.data['next']).data['next'])
+    assert last.data['next'] is None
+
+    pages = walk(user_client, last.data['previous'], link='previous')
+
+    assert pages == [names[2:4], names[:2]]
+
+
+def test_cursor_follows_popular_ordering(make_recipe, user_client):
+    recipes = [make_recipe(f'Рецепт {index}') for index in range(6)]
+    Recipe.objects.update(pub_date=PUB_DATE)
+    for recipe, count in zip(recipes, (1, 3, 1, 2, 3, 1)):
+        Recipe.objects.filter(pk=recipe.pk).update(favorites_count=count)
+    expected = ['Рецепт 4', 'Рецепт 1', 'Рецепт 3',
+                'Рецепт 5', 'Рецепт 2', 'Рецепт 0']
+
+    pages = walk(user_client,
+                 '/api/recipes/?pagination=cursor&limit=4&ordering=popular')
+
+    assert pages == [expected[:4], expected[4:]]
@@ -0,0 +1,30 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+from recipes.models import Recipe
+
+
+def test_stats_command_refuses_process_local_cache():
+    with pytest.raises(CommandError):
+        call_command('feed_cache_stats')
+
+
+def test_feed_cache_is_invalidated_after_commit(
+        anonymous_client, author, make_recipe,
+        django_capture_on_commit_callbacks):
+    make_recipe('Первый')
+
+    response = anonymous_client.get('/api/recipes/')
+    assert response['X-Cache'] == 'MISS'
+    response = anonymous_client.get('/api/recipes/')
+    assert response['X-Cache'] == 'HIT'
+    assert response.data['count'] == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Recipe.objects.create(author=author, name='Второй', text='Описание',
+                              cooking_time=5,
+                              image='recipes/images/recipe.jpg')
+
+    response = anonymous_client.get('/api/recipes/')
+    assert response['X-Cache'] == 'MISS'
+    assert response.data['count'] == 2
@@ -0,0 +1,88 @@
+from io import BytesIO
+from unittest import mock
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from PIL import Image
+
+from recipes.images import (WEBP_SUPPORTED, get_storage, process_in_worker,
+                            process_recipe_image, schedule_variants,
+                            store_image)
+from recipes.models import Recipe
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
+    return tmp_path
+
+
+def jpeg(width, height=300):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), '#E26C2D').save(buffer, 'JPEG')
+    return ContentFile(buffer.getvalue(), name='recipe.jpg')
+
+
+def recipe_with_image(make_recipe, file):
+    recipe = make_recipe()
+    recipe.image = store_image(file)
+    recipe.save(update_fields=['image'])
+    return recipe
+
+
+def test_variants_are_built_for_smaller_widths(make_recipe):
+    recipe = recipe_with_image(make_recipe, jpeg(800))
+
+    assert process_recipe_image(recipe.pk, recipe.image.name)
+
+    recipe.refresh_from_db()
+    expected = {'default': 'jpg'}
+    if WEBP_SUPPORTED:
+        expected['webp'] = 'webp'
+    assert set(recipe.image_variants) == set(expected)
+    storage = get_storage()
+    for image_format, extension in expected.items():
+        names = recipe.image_variants[image_format]
+        assert sorted(names, key=int) == ['320', '640']
+        for width, name in names.items():
+            assert name.endswith(f'_{width}.{extension}')
+            with storage.open(name) as file:
+                assert Image.open(file).width == int(width)
+
+
+def test_small_image_keeps_its_own_width(make_recipe):
+    recipe = recipe_with_image(make_recipe, jpeg(200))
+
+    process_recipe_image(recipe.pk, recipe.image.name)
+
+    recipe.refresh_from_db()
+    assert list(recipe.image_variants['default']) == ['200']
+
+
+def test_saved_image_is_rendered_after_commit(
+        make_recipe, django_capture_on_commit_callbacks):
+    recipe = recipe_with_image(make_recipe, jpeg(800))
+
+    with mock.patch('recipes.images.executor') as executor:
+        with django_capture_on_commit_callbacks(execute=True):
+            schedule_variants(recipe)
+            executor.submit.assert_not_called()
+
+    executor.submit.assert_called_once_with(
+        process_in_worker, recipe.pk, recipe.image.name)
+
+
+def test_corrupt_image_is_reported_and_left_without_variants(
+        make_recipe, media_root, capsys):
+    recipe = recipe_with_image(
+        make_recipe, ContentFile(b'not an image', name='broken.jpg'))
+
+    call_command('build_image_variants')
+
+    output = capsys.readouterr()
+    assert recipe.image.name in output.err
+    assert 'с ошибками: 1' in output.out
+    assert Recipe.objects.get(pk=recipe.pk).image_variants == {}
+    assert not (media_root / 'recipes' / 'images' / 'variants').exists()
@@ -0,0 +1,47 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+from recipes.models import DataImport, Ingredient
+
+
+@pytest.fixture
+def data_dir(settings, tmp_path):
+    settings.CSV_FILES_DIR = str(tmp_path)
+    (tmp_path / 'ingredients.csv').write_text(
+        'абрикосы,г\nбаклажаны,шт\nвода,мл\n', encoding='utf-8')
+    return tmp_path
+
+
+@pytest.mark.parametrize('batch_size', ['0', '-5'])
+def test_batch_size_below_one_is_rejected(db, data_dir, batch_size):
+    with pytest.raises(CommandError):
+        call_command('add_ingredients', f'--batch-size={batch_size}')
+    with pytest.raises(CommandError):
+        call_command('add_ingredients', batch_size=int(batch_size))
+
+    assert not Ingredient.objects.exists()
+    assert not DataImport.objects.exists()
+
+
+def test_forced_reload_is_idempotent(db, data_dir):
+    call_command('add_ingredients', '--batch-size=2')
+    call_command('add_ingredients', '--batch-size=2', '--force')
+
+    assert sorted(Ingredient.objects.values_list(
+        'name', 'measurement_unit')) == [
+        ('абрикосы', 'г'), ('баклажаны', 'шт'), ('вода', 'мл')]
+    assert DataImport.objects.get().source == 'ingredients.csv'
+
+
+def test_unchanged_file_is_skipped(db, data_dir, capsys):
+    call_command('add_ingredients')
+    Ingredient.objects.all().delete()
+
+    call_command('add_ingredients')
+    assert 'уже загружен' in capsys.readouterr().out
+    assert not Ingredient.objects.exists()
+
+    with open(data_dir / 'ingredients.csv', 'a', encoding='utf-8') as file:
+        file.write('груши,г\n')
+    call_command('add_ingredients')
+    assert Ingredient.objects.count() == 4
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+from rest_framework.test import APIClient
+
+from api.metrics import registry
+
+
+@pytest.fixture
+def metrics(settings):
+    settings.API_METRICS_ENABLED = True
+    settings.DEBUG = False
+
+
+def test_server_timing_is_hidden_from_regular_users(metrics, tags,
+                                                    user_client):
+    response = user_client.get('/api/tags/')
+
+    assert response.status_code == 200
+    assert 'Server-Timing' not in response
+
+
+def test_server_timing_is_sent_to_staff(metrics, tags, user):
+    user.is_staff = True
+    user.save()
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.get('/api/tags/')
+
+    assert response.status_code == 200
+    assert 'render;dur=' in response['Server-Timing']
+    assert 'render_ms' in registry.snapshot()['api:tags-list']
+
+
+def test_metrics_report_the_worker_they_describe(metrics, tags, user):
+    user.is_staff = True
+    user.save()
+    client = APIClient()
+    client.force_authenticate(user)
+    client.get('/api/tags/')
+
+    response = client.get('/api/_metrics/')
+
+    assert response.data['pid'] == os.getpid()
+    assert response.data['views']['api:tags-list']['requests'] >= 1
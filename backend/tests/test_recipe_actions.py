@@ -0,0 +1,25 @@
+import pytest
+
+from recipes.models import Favorite, ShoppingCart
+
+
+@pytest.mark.parametrize('url', ('favorite', 'shopping_cart'))
+def test_list_body_is_rejected(make_recipe, user, user_client, url):
+    recipe = make_recipe()
+
+    response = user_client.post(f'/api/recipes/{recipe.pk}/{url}/',
+                                [1, 2], format='json')
+
+    assert response.status_code == 400
+    assert not Favorite.objects.filter(user=user).exists()
+    assert not ShoppingCart.objects.filter(user=user).exists()
+
+
+def test_add_to_shopping_cart_with_servings(make_recipe, user, user_client):
+    recipe = make_recipe()
+
+    response = user_client.post(f'/api/recipes/{recipe.pk}/shopping_cart/',
+                                {'servings': 3}, format='json')
+
+    assert response.status_code == 201
+    assert ShoppingCart.objects.get(user=user).servings == 3
@@ -0,0 +1,23 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscription
+
+
+def test_feed_query_count_does_not_depend_on_page_size(
+        user, author, user_client, make_recipe, django_assert_num_queries):
+    recipes = [make_recipe(f'Рецепт {index}') for index in range(12)]
+    Favorite.objects.create(user=user, recipe=recipes[0])
+    ShoppingCart.objects.create(user=user, recipe=recipes[1])
+    Subscription.objects.create(user=user, author=author)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.get('/api/recipes/?limit=6')
+    assert response.status_code == 200
+    assert len(response.data['results']) == 6
+
+    with django_assert_num_queries(len(queries)):
+        response = user_client.get('/api/recipes/?limit=50')
+    assert response.status_code == 200
+    assert len(response.data['results']) == 12
@@ -0,0 +1,74 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from recipes.caches import RecipeIngredientIndex, RelatedRecipeIndex
+from recipes.models import Recipe
+
+
+@pytest.fixture
+def recipe(make_recipe):
+    recipe = make_recipe()
+    Recipe.objects.update(updated_at=timezone.now() - timedelta(days=1))
+    return recipe
+
+
+def feature_count(index, recipe):
+    index.ensure()
+    return int(index._sizes[index._rows[recipe.pk]])
+
+
+def test_reverse_tag_clear_refreshes_features(
+        recipe, tags, django_capture_on_commit_callbacks):
+    index = RelatedRecipeIndex()
+    assert feature_count(index, recipe) == 5
+
+    with django_capture_on_commit_callbacks(execute=True):
+        tags[0].recipes.clear()
+
+    assert feature_count(index, recipe) == 4
+
+
+def test_tag_delete_refreshes_features(
+        recipe, tags, django_capture_on_commit_callbacks):
+    index = RelatedRecipeIndex()
+    assert feature_count(index, recipe) == 5
+
+    with django_capture_on_commit_callbacks(execute=True):
+        tags[0].delete()
+
+    assert feature_count(index, recipe) == 4
+
+
+def test_ingredient_delete_refreshes_indexes(
+        recipe, ingredients, django_capture_on_commit_callbacks):
+    related, cookable = RelatedRecipeIndex(), RecipeIngredientIndex()
+    have = [ingredients[0].pk, ingredients[1].pk]
+    assert feature_count(related, recipe) == 5
+    assert cookable.cookable(have) == {}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ingredients[2].delete()
+
+    assert feature_count(related, recipe) == 4
+    assert cookable.cookable(have) == {recipe.pk: 0}
+
+
+def test_related_waits_for_a_refresh(recipe, make_recipe):
+    other = make_recipe('Другой', amounts=(100,))
+    index = RelatedRecipeIndex()
+    index.ensure()
+    index.ensure = lambda: None
+    results = []
+
+    with index._lock:
+        reader = threading.Thread(
+            target=lambda: results.append(index.related(recipe.pk, 5)))
+        reader.start()
+        reader.join(0.1)
+        assert reader.is_alive()
+
+    reader.join()
+    assert results == [[other.pk]]
@@ -0,0 +1,36 @@
+from unittest import mock
+
+from django.db import connection
+
+from recipes.models import Recipe, RecipeIngredient
+
+
+def test_patch_text_updates_only_the_recipe_row(author_client, make_recipe,
+                                                django_assert_num_queries):
+    recipe = make_recipe()
+    ingredients = list(RecipeIngredient.objects.filter(
+        recipe=recipe).values_list('pk', 'ingredient_id', 'amount'))
+    search_vector_update = int(connection.vendor == 'postgresql')
+
+    with mock.patch('api.serializers.store_image') as store_image, \
+            mock.patch('api.serializers.delete_image') as delete_image, \
+            mock.patch('api.serializers.schedule_variants') as schedule, \
+            django_assert_num_queries(8 + search_vector_update) as queries:
+        response = author_client.patch(f'/api/recipes/{recipe.pk}/',
+                                       {'text': 'Новое описание'},
+                                       format='json')
+
+    assert response.status_code == 200
+    writes = [query['sql'] for query in queries.captured_queries
+              if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+    assert len(writes) == 1 + search_vector_update
+    assert all(sql.startswith('UPDATE "recipes_recipe" ') for sql in writes)
+    assert '"text"' in writes[0] and '"image"' not in writes[0]
+    store_image.assert_not_called()
+    delete_image.assert_not_called()
+    schedule.assert_not_called()
+    recipe = Recipe.objects.get(pk=recipe.pk)
+    assert recipe.text == 'Новое описание'
+    assert recipe.image.name == 'recipes/images/recipe.jpg'
+    assert list(RecipeIngredient.objects.filter(recipe=recipe).values_list(
+        'pk', 'ingredient_id', 'amount')) == ingredients
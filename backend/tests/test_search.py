@@ -0,0 +1,50 @@
+import pytest
+from django.db import connection
+
+from recipes.models import Ingredient, Recipe
+from recipes.search import (full_text_search_supported, search_recipes,
+                            update_search_vectors)
+
+
+@pytest.fixture
+def searchable(make_recipe):
+    soup = make_recipe('Борщ')
+    Recipe.objects.filter(pk=soup.pk).update(text='Суп со свёклой')
+    pie = make_recipe('Пирог')
+    Ingredient.objects.filter(name='Ингредиент 0').update(name='Яблоки')
+    make_recipe('Омлет', amounts=(100,))
+    return soup, pie
+
+
+def feed_ids(client, query):
+    response = client.get('/api/recipes/', {'search': query})
+    assert response.status_code == 200
+    return [item['id'] for item in response.data['results']]
+
+
+@pytest.mark.skipif(connection.vendor == 'postgresql',
+                    reason='Подстрочный поиск используется без PostgreSQL')
+def test_substring_search_matches_name_text_and_ingredients(
+        searchable, anonymous_client):
+    soup, pie = searchable
+
+    assert not full_text_search_supported()
+    assert update_search_vectors(Recipe.objects.all()) == 0
+    assert feed_ids(anonymous_client, 'Борщ') == [soup.pk]
+    assert feed_ids(anonymous_client, 'свёкл') == [soup.pk]
+    assert len(feed_ids(anonymous_client, 'Яблок')) == 3
+    assert feed_ids(anonymous_client, 'шоколад') == []
+    assert len(feed_ids(anonymous_client, '   ')) == 3
+
+
+@pytest.mark.skipif(connection.vendor != 'postgresql',
+                    reason='Полнотекстовый поиск доступен только в '
+                           'PostgreSQL')
+def test_full_text_search_ranks_name_above_ingredients(searchable):
+    soup, pie = searchable
+    assert update_search_vectors(Recipe.objects.all()) == 3
+
+    found = list(search_recipes(Recipe.objects.all(), 'пирог'))
+    assert [recipe.pk for recipe in found] == [pie.pk]
+    found = list(search_recipes(Recipe.objects.all(), 'суп'))
+    assert [recipe.pk for recipe in found] == [soup.pk]
@@ -0,0 +1,34 @@
+import pytest
+
+from recipes.models import ShoppingCart
+
+
+@pytest.fixture
+def cart(user, make_recipe):
+    return ShoppingCart.objects.create(user=user, recipe=make_recipe(),
+                                       servings=2)
+
+
+@pytest.mark.parametrize('file_ext, content_type', (
+    ('txt', 'text/plain; charset=utf-8'),
+    ('csv', 'text/csv; charset=utf-8'),
+))
+def test_download_in_supported_format(cart, user_client, file_ext,
+                                      content_type):
+    response = user_client.get(
+        f'/api/recipes/download_shopping_cart/?format={file_ext}')
+
+    assert response.status_code == 200
+    assert response['Content-Type'] == content_type
+    assert response['Content-Disposition'] == (
+        f'attachment; filename="user_shopping_cart.{file_ext}"')
+    assert 'Ингредиент 0' in b''.join(
+        response.streaming_content).decode()
+
+
+def test_unknown_format_is_rejected(cart, user_client):
+    response = user_client.get(
+        '/api/recipes/download_shopping_cart/?format=xyz')
+
+    assert response.status_code == 400
+    assert response.json() == {'detail': 'Недопустимый формат файла.'}
@@ -0,0 +1,28 @@
+from recipes.models import ShoppingCart, ShoppingListLine
+from recipes.shopping_list import compute_lines, rebuild_lines, stored_lines
+
+
+def test_compute_lines_for_several_carted_recipes(user, author, ingredients,
+                                                  make_recipe):
+    first = make_recipe('Первый', amounts=(100, 200, 300))
+    second = make_recipe('Второй', amounts=(10, 20))
+    third = make_recipe('Третий', amounts=(1,))
+    ShoppingCart.objects.create(user=user, recipe=first, servings=2)
+    ShoppingCart.objects.create(user=user, recipe=second, servings=3)
+    ShoppingCart.objects.create(user=user, recipe=third)
+    ShoppingCart.objects.create(user=author, recipe=first)
+    expected = {
+        ingredients[0].pk: 100 * 2 + 10 * 3 + 1,
+        ingredients[1].pk: 200 * 2 + 20 * 3,
+        ingredients[2].pk: 300 * 2,
+    }
+
+    assert compute_lines([user.pk])[user.pk] == expected
+    assert compute_lines()[user.pk] == expected
+    assert stored_lines([user.pk])[user.pk] == expected
+
+    ShoppingListLine.objects.filter(user=user).update(total_amount=1)
+    rebuild_lines([user.pk])
+
+    assert stored_lines([user.pk])[user.pk] == expected
+    assert stored_lines([author.pk]) == compute_lines([author.pk])
@@ -0,0 +1,21 @@
+from recipes.models import RecipeSimilarity
+
+
+def test_similar_recipes(make_recipe, user_client):
+    recipe, close, far = (make_recipe(name)
+                          for name in ('Рецепт', 'Близкий', 'Дальний'))
+    RecipeSimilarity.objects.bulk_create([
+        RecipeSimilarity(recipe=recipe, similar=far, score=0.2),
+        RecipeSimilarity(recipe=recipe, similar=close, score=0.9),
+    ])
+
+    response = user_client.get(f'/api/recipes/{recipe.pk}/similar/')
+
+    assert response.status_code == 200
+    assert [item['id'] for item in response.data] == [close.pk, far.pk]
+
+
+def test_similar_for_unknown_recipe_is_not_found(db, user_client):
+    response = user_client.get('/api/recipes/404/similar/')
+
+    assert response.status_code == 404
@@ -0,0 +1,25 @@
+import pytest
+
+from users.models import Subscription
+
+
+@pytest.mark.parametrize('query', ['', '?recipes_limit=2'])
+def test_subscriptions_without_subscriptions(user_client, query):
+    response = user_client.get(f'/api/users/subscriptions/{query}')
+
+    assert response.status_code == 200
+    assert response.data['results'] == []
+
+
+def test_subscriptions_limit_latest_recipes(user, author, user_client,
+                                            make_recipe):
+    recipes = [make_recipe(f'Рецепт {index}') for index in range(3)]
+    Subscription.objects.create(user=user, author=author)
+
+    response = user_client.get('/api/users/subscriptions/?recipes_limit=2')
+
+    assert response.status_code == 200
+    subscription, = response.data['results']
+    assert subscription['id'] == author.pk
+    assert [recipe['id'] for recipe in subscription['recipes']] == [
+        recipes[2].pk, recipes[1].pk]
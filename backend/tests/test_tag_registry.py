@@ -0,0 +1,63 @@
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+
+from recipes.caches import TagRegistry
+from recipes.models import CacheVersion, Tag
+from recipes.versions import get_versions
+
+
+def test_registry_follows_tags_committed_by_another_worker(
+        tags, django_capture_on_commit_callbacks):
+    registry, other_worker = TagRegistry(), TagRegistry()
+    assert registry.get_by_slug('dinner') is None
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert other_worker.get_by_slug('lunch') is not None
+        Tag.objects.create(name='Ужин', color='#8775D2', slug='dinner')
+        assert registry.get_by_slug('dinner') is None
+
+    assert registry.get_by_slug('dinner').name == 'Ужин'
+    assert other_worker.get_by_slug('dinner').name == 'Ужин'
+
+
+def test_tag_endpoint_sees_a_stamp_bumped_elsewhere(tags, anonymous_client):
+    assert anonymous_client.get('/api/tags/').data[0]['slug'] == 'breakfast'
+
+    Tag.objects.bulk_create(
+        [Tag(name='Ужин', color='#8775D2', slug='dinner')])
+    assert len(anonymous_client.get('/api/tags/').data) == 2
+
+    CacheVersion.objects.filter(name='tags').update(version=F('version') + 1)
+    response = anonymous_client.get('/api/tags/')
+    assert [tag['slug'] for tag in response.data] == [
+        'breakfast', 'lunch', 'dinner']
+
+
+def test_feed_filtered_by_tags_reads_the_stamps_once(
+        make_recipe, anonymous_client, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        recipe = make_recipe()
+    get_versions('recipes', 'tags', 'ingredients', 'users')
+
+    with CaptureQueriesContext(connection) as context:
+        response = anonymous_client.get(
+            '/api/recipes/', {'tags': ['breakfast', 'lunch']})
+
+    assert [item['id'] for item in response.data['results']] == [recipe.pk]
+    stamps = [query for query in context.captured_queries
+              if CacheVersion._meta.db_table in query['sql']]
+    assert len(stamps) == 1
+
+
+def test_unknown_tag_is_rejected_from_the_same_snapshot(
+        tags, anonymous_client):
+    get_versions('recipes', 'tags', 'ingredients', 'users')
+
+    with CaptureQueriesContext(connection) as context:
+        response = anonymous_client.get('/api/recipes/', {'tags': 'dinner'})
+
+    assert response.status_code == 400
+    stamps = [query for query in context.captured_queries
+              if CacheVersion._meta.db_table in query['sql']]
+    assert len(stamps) == 1
@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from recipes.models import Favorite, Recipe
+from recipes.trending import update_trending_scores
+
+
+@pytest.fixture
+def favorited(make_recipe, user, author):
+    now = timezone.now().replace(minute=0, second=0, microsecond=0)
+    fresh, older, expired = (make_recipe('Свежий'), make_recipe('Старше'),
+                             make_recipe('Забытый'))
+    Recipe.objects.filter(pk=expired.pk).update(trending_score=5)
+    users = [user, author]
+    for recipe, users_count, age in ((fresh, 2, timedelta(hours=1)),
+                                     (older, 1, timedelta(hours=72)),
+                                     (expired, 2, timedelta(days=20))):
+        for fan in users[:users_count]:
+            favorite = Favorite.objects.create(user=fan, recipe=recipe)
+            Favorite.objects.filter(pk=favorite.pk).update(
+                added_at=now - age)
+    return now, fresh, older, expired
+
+
+def test_scores_decay_inside_the_window(favorited, settings):
+    settings.TRENDING_HALF_LIFE_HOURS = 72
+    settings.TRENDING_WINDOW_DAYS = 14
+    now, fresh, older, expired = favorited
+
+    assert update_trending_scores(now) == (2, 1)
+
+    scores = dict(Recipe.objects.values_list('pk', 'trending_score'))
+    assert scores[fresh.pk] == pytest.approx(2 * 0.5 ** (1 / 72))
+    assert scores[older.pk] == pytest.approx(0.5)
+    assert scores[expired.pk] == 0
+
+
+def test_trending_feed_order(favorited, anonymous_client,
+                             django_capture_on_commit_callbacks):
+    now, fresh, older, expired = favorited
+
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command('update_trending')
+    response = anonymous_client.get('/api/recipes/',
+                                    {'ordering': 'trending'})
+
+    assert [item['id'] for item in response.data['results']] == [
+        fresh.pk, older.pk, expired.pk]
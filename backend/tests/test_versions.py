@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+
+from recipes.caches import IngredientIndex
+from recipes.models import CacheVersion, Ingredient, Recipe
+from recipes.versions import bump_version, get_version, get_versions
+
+
+def test_versions_are_stored_in_the_database(
+        db, django_capture_on_commit_callbacks):
+    first, second = get_versions('ingredients', 'tags')
+    cache.clear()
+
+    assert get_versions('ingredients', 'tags') == [first, second]
+    with django_capture_on_commit_callbacks(execute=True):
+        bump_version('ingredients', 'recipe:1')
+    assert CacheVersion.objects.get(name='ingredients').version != first
+    assert CacheVersion.objects.filter(name='recipe:1').exists()
+    assert get_version('tags') == second
+
+
+def test_ingredient_index_follows_a_bump_from_another_worker(ingredients):
+    index = IngredientIndex()
+    assert index.search('морковь') == []
+
+    Ingredient.objects.bulk_create(
+        [Ingredient(name='Морковь', measurement_unit='г')])
+    assert index.search('морковь') == []
+
+    CacheVersion.objects.filter(name='ingredients').update(
+        version=F('version') + 1)
+    assert [item.name for item in index.search('морковь')] == ['Морковь']
+
+
+def test_bump_is_visible_only_after_commit(
+        db, django_capture_on_commit_callbacks):
+    before = get_version('ingredients')
+
+    with django_capture_on_commit_callbacks(execute=True):
+        bump_version('ingredients')
+        assert get_version('ingredients') == before
+
+    assert get_version('ingredients') != before
+
+
+def test_recipe_save_bumps_versions_on_commit(
+        make_recipe, django_capture_on_commit_callbacks):
+    recipe = make_recipe()
+    before = get_version(f'recipe:{recipe.pk}')
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        Recipe.objects.get(pk=recipe.pk).save(update_fields=['text'])
+        assert get_version(f'recipe:{recipe.pk}') == before
+
+    assert callbacks
+    assert get_version(f'recipe:{recipe.pk}') != before
+
+
+def test_ingredient_search_reads_the_stamp_once(
+        ingredients, anonymous_client):
+    get_version('ingredients')
+
+    with CaptureQueriesContext(connection) as context:
+        response = anonymous_client.get('/api/ingredients/',
+                                        {'name': 'ингредиент 1'})
+
+    assert [item['name'] for item in response.data] == ['Ингредиент 1']
+    stamps = [query for query in context.captured_queries
+              if CacheVersion._meta.db_table in query['sql']]
+    assert len(stamps) == 1
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.utils.translation import gettext_lazy as _
 
 from .models import FoodgramUser, Subscription
 
@@ -12,6 +13,8 @@ class UserAdmin(UserAdmin):
         'email',
         'first_name',
         'last_name',
+        'recipes_count',
+        'followers_count',
     )
     list_display_links = ('username',)
     search_fields = ('username',)
@@ -22,6 +25,13 @@ class UserAdmin(UserAdmin):
         'last_name'
     )
     list_fields = ('first_name',)
+    readonly_fields = (
+        'recipes_count',
+        'followers_count'
+    )
+    fieldsets = UserAdmin.fieldsets + (
+        (_('Счетчики'), {'fields': readonly_fields}),
+    )
     empty_value_display = '-пусто-'
 
 
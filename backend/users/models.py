@@ -1,14 +1,15 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.db import models
-from django.db.models import Q, F, CheckConstraint, UniqueConstraint
+from django.db.models import CheckConstraint, F, Q, UniqueConstraint
 from django.utils.translation import gettext_lazy as _
-from django.contrib.auth.validators import UnicodeUsernameValidator
 
+from recipes.constants import EMAIL_LENGTH, NAME_LENGTH
+from recipes.mixins import CounterFieldsMixin
 from recipes.validators import validate_name
-from recipes.constants import (NAME_LENGTH, EMAIL_LENGTH)
 
 
-class FoodgramUser(AbstractUser):
+class FoodgramUser(CounterFieldsMixin, AbstractUser):
 
     username = models.CharField(
         verbose_name=_('Логин'),
@@ -40,10 +41,22 @@ class FoodgramUser(AbstractUser):
         symmetrical=False,
         related_name='following_relationships'
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name=_('Количество рецептов'),
+        default=0,
+        editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name=_('Количество подписчиков'),
+        default=0,
+        editable=False
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('first_name', 'last_name', 'password', 'username')
 
+    counter_fields = ('recipes_count', 'followers_count')
+
     class Meta:
         app_label = 'users'
         verbose_name = _('Пользователь')
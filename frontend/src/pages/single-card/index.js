@@ -42,6 +42,7 @@ const SingleCard = ({ loadItem, updateOrders }) => {
   const {
     author = {},
     image,
+    image_srcset,
     tags,
     cooking_time,
     name,
@@ -59,7 +60,15 @@ const SingleCard = ({ loadItem, updateOrders }) => {
         <meta property="og:title" content={name} />
       </MetaTags>
       <div className={styles['single-card']}>
-        <img src={image} alt={name} className={styles["single-card__image"]} />
+        <picture>
+          {image_srcset && <source type="image/webp" srcSet={image_srcset.webp} />}
+          <img
+            src={image}
+            srcSet={image_srcset ? image_srcset.default : undefined}
+            alt={name}
+            className={styles["single-card__image"]}
+          />
+        </picture>
         <div className={styles["single-card__info"]}>
           <div className={styles["single-card__header-info"]}>
               <h1 className={styles["single-card__title"]}>{name}</h1>
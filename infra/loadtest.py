@@ -0,0 +1,116 @@
+import argparse
+import http.client
+import os
+import statistics
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+DEFAULT_PATHS = (
+    '/api/recipes/?limit=6',
+    '/api/recipes/?limit=6&pagination=cursor',
+    '/api/tags/',
+    '/api/ingredients/?name=мо',
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Нагрузочный тест API Foodgram: задержки и пропускная '
+                    'способность при разной конкурентности')
+    parser.add_argument('url', help='Например, http://localhost:8000')
+    parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS)
+    parser.add_argument('--concurrency', type=int, nargs='+',
+                        default=[1, 10, 50, 100])
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--token', help='Токен для заголовка Authorization')
+    parser.add_argument('--process-name', default='gunicorn',
+                        help='Процессы сервера, чья память суммируется')
+    return parser.parse_args()
+
+
+def server_rss(process_name):
+    total = 0
+    for pid in filter(str.isdigit, os.listdir('/proc')):
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as cmdline:
+                if process_name.encode() not in cmdline.read():
+                    continue
+            with open(f'/proc/{pid}/status') as status:
+                for line in status:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+        except OSError:
+            continue
+    return total / 1024
+
+
+def client(url, paths, headers, deadline, results):
+    parts = urlsplit(url)
+    connection_class = (http.client.HTTPSConnection
+                        if parts.scheme == 'https'
+                        else http.client.HTTPConnection)
+    connection = connection_class(parts.netloc, timeout=30)
+    latencies, errors, index = [], 0, 0
+    while time.perf_counter() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+    results.append((latencies, errors))
+
+
+def run(url, paths, headers, concurrency, duration):
+    results = []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=client,
+                                args=(url, paths, headers, deadline, results))
+               for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies = sorted(value for items, _ in results for value in items)
+    errors = sum(count for _, count in results)
+    return latencies, errors
+
+
+def percentile(values, share):
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def main():
+    args = parse_args()
+    headers = {'Accept': 'application/json'}
+    if args.token:
+        headers['Authorization'] = f'Token {args.token}'
+    paths = [quote(path, safe='/?=&') for path in args.paths]
+    print(f'{"клиентов":>8} {"запросов":>9} {"RPS":>8} {"p50, мс":>9} '
+          f'{"p95, мс":>9} {"p99, мс":>9} {"ошибок":>7} {"RSS, МБ":>8}')
+    for concurrency in args.concurrency:
+        latencies, errors = run(args.url, paths, headers,
+                                concurrency, args.duration)
+        median = statistics.median(latencies) if latencies else 0
+        print(f'{concurrency:>8} {len(latencies):>9} '
+              f'{len(latencies) / args.duration:>8.1f} '
+              f'{median * 1000:>9.1f} '
+              f'{percentile(latencies, 0.95) * 1000:>9.1f} '
+              f'{percentile(latencies, 0.99) * 1000:>9.1f} '
+              f'{errors:>7} {server_rss(args.process_name):>8.0f}')
+
+
+if __name__ == '__main__':
+    main()